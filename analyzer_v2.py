@@ -1,166 +1,179 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Any
+from metrics import RunMetrics
+from ranking import IncrementalRanker
 
 
 class AnalyzerV2:
-    def __init__(self, model, strategies, content_store, prompt_manager_v2):
+    def __init__(self, model, strategies, content_store, prompt_manager_v2, verdict_cache=None, journal=None,
+                 metrics=None, cascade=None, on_progress=None, on_batch=None, on_resumed=None):
         self.model = model
         self.strategies = strategies
         self.content_store = content_store
         self.pm = prompt_manager_v2
+        # Optional verdict cache shared across runs: (user_query, doc_id) -> analysis entry
+        self.verdict_cache = verdict_cache if verdict_cache is not None else {}
+        # Optional RunJournal: checkpoints searches and batches, and skips work already recorded
+        self.journal = journal
+        self.metrics = metrics or getattr(content_store, 'metrics', None) or RunMetrics()
+        # Optional PriorityScheduler shared with the content store: best-first batches and run deadline
+        self.scheduler = getattr(content_store, 'scheduler', None)
+        # Optional ModelCascade: cheap screening pass, stronger model only for flagged verdicts
+        self.cascade = cascade
+        # Verdicts are ranked as they arrive; `on_progress(ranker)` runs after each batch (e.g. live top-N)
+        self.ranker = None
+        self.on_progress = on_progress
+        # `on_batch(analysis)` receives each batch's new verdicts as they land (e.g. streaming export);
+        # verdicts reused from the journal were already delivered by the earlier run and go to
+        # `on_resumed(analysis)` instead (e.g. an export that was started fresh)
+        self.on_batch = on_batch
+        self.on_resumed = on_resumed
 
     def analyze_topic(self, user_query: str, num_results_per_search: int, additional_fqs=None) -> Dict[str, Any]:
         print(f"\n[V2] Starting analysis for: {user_query}")
-        cached_docs = self.content_store.execute_searches(self.strategies, num_results_per_search, additional_fqs)
-        results = self._analyze_documents_in_batches(cached_docs, user_query)
+        cached_docs = self.content_store.execute_searches(self.strategies, num_results_per_search, additional_fqs,
+                                                          journal=self.journal)
+        results = self.analyze_documents_in_batches(cached_docs, user_query)
         return results, cached_docs
 
-    def _analyze_documents_in_batches(self, docs: Dict[str, Any], user_query: str, BATCH_SIZE=5) -> Dict[str, Any]:
+    def analyze_documents_in_batches(self, docs: Dict[str, Any], user_query: str, BATCH_SIZE=5) -> Dict[str, Any]:
         batch_results: Dict[str, Any] = {}
-        doc_list = list(docs.values())
-
-        for i in range(0, len(doc_list), BATCH_SIZE):
+        resumed = self.journal.batch_results if self.journal is not None else {}
+        journaled: Dict[str, Any] = {}
+        doc_list = []
+        seen = 0
+        for doc in docs.values():
+            if doc.get('seen'):
+                # Reviewed in an earlier run of this project: still counted for frequency, not re-labeled
+                seen += 1
+                continue
+            if doc['id'] in resumed:
+                batch_results[doc['id']] = journaled[doc['id']] = resumed[doc['id']]
+                continue
+            cached = self.verdict_cache.get((user_query, doc['id']))
+            self.metrics.record_cache('analyze', cached is not None)
+            if cached is not None:
+                batch_results[doc['id']] = cached
+            else:
+                doc_list.append(doc)
+        self.ranker = IncrementalRanker(docs, self.content_store.frequency)
+        if seen:
+            print(f"[V2] Skipping {seen} documents already reviewed in this project")
+            self.metrics.incr('analyze', 'seen_skipped', seen)
+        if batch_results:
+            print(f"[V2] Reusing {len(batch_results)} journaled/cached verdicts")
+            self.ranker.update(batch_results)
+            cached = {doc_id: v for doc_id, v in batch_results.items() if doc_id not in journaled}
+            if journaled and self.on_resumed is not None:
+                self.on_resumed(journaled)
+            if cached and self.on_batch is not None:
+                self.on_batch(cached)
+        if self.scheduler is not None:
+            doc_list = self.scheduler.order(doc_list, self.content_store)
+
+        def run(i: int):
+            """Label one batch; returns (start, analysis, error, skipped by deadline)"""
+            if self.scheduler is not None and self.scheduler.expired():
+                return i, None, None, True
             batch = doc_list[i:i + BATCH_SIZE]
             try:
-                prompt = self.pm.create_document_analysis_prompt(batch, user_query)
-                response = self.model.generate_content(prompt)
-                analysis = self.pm.parse_response(response.text)
+                if self.cascade is not None:
+                    return i, self._cascade_batch(batch, user_query, i), None, False
+                return i, self._label_batch(self.model, self.pm, batch, user_query, 'analyze', i), None, False
+            except Exception as e:
+                return i, None, e, False
+
+        starts = list(range(0, len(doc_list), BATCH_SIZE))
+        # With an AdaptiveLimiter on the model, batches run concurrently and the limiter
+        # decides how many calls are in flight; otherwise they run one at a time
+        limiter = getattr(self.model, 'limiter', None)
+        pool = ThreadPoolExecutor(max_workers=limiter.max_limit) if limiter is not None and len(starts) > 1 else None
+        if pool is not None:
+            outcomes = (f.result() for f in as_completed([pool.submit(run, i) for i in starts]))
+        else:
+            outcomes = map(run, starts)
+        skipped = 0
+        try:
+            # Results are merged on this thread, so cache and journal writes stay sequential
+            for i, analysis, error, expired in outcomes:
+                if expired:
+                    skipped += len(doc_list[i:i + BATCH_SIZE])
+                    continue
+                if error is not None:
+                    self.metrics.incr('analyze', 'failed_batches')
+                    print(f"[V2] Error in batch {i}: {error}")
+                    continue
                 if analysis:
                     batch_results.update(analysis)
+                    for doc_id, details in analysis.items():
+                        self.verdict_cache[(user_query, doc_id)] = details
+                    if self.journal is not None:
+                        self.journal.record_batch(analysis)
                     self._print_batch_labels(analysis)
-            except Exception as e:
-                print(f"[V2] Error in batch {i}: {e}")
+                    self.ranker.update(analysis)
+                    if self.on_batch is not None:
+                        self.on_batch(analysis)
+                    if self.on_progress is not None:
+                        self.on_progress(self.ranker)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        if skipped:
+            print(f"[V2] Run deadline reached; {skipped} lower-priority documents not analyzed")
+        if self.cascade is not None:
+            stats = self.metrics.report()['stages'].get('cascade', {})
+            print(f"[V2] Cascade: escalated {int(stats.get('escalated', 0))} of {int(stats.get('screened', 0))} "
+                  f"screened documents ({stats.get('escalation_rate', 0.0):.0%})")
         return batch_results
 
+    def _label_batch(self, model, pm, batch, user_query: str, stage: str, i: int) -> Dict[str, Any]:
+        with self.metrics.stage(stage, batch=i, docs=len(batch)):
+            prompt, response = pm.generate_analysis(model, batch, user_query)
+        self.metrics.record_llm(stage, prompt, response)
+        return pm.parse_response(response.text)
+
+    def _cascade_batch(self, batch, user_query: str, i: int) -> Dict[str, Any]:
+        """Screen the batch cheaply, then re-label flagged documents with the strong model"""
+        if self.cascade.screener is not None:
+            with self.metrics.stage('screen', batch=i, docs=len(batch)):
+                analysis = self.cascade.screener.screen(batch, user_query)
+        else:
+            analysis = self._label_batch(self.model, self.pm, batch, user_query, 'screen', i)
+        flagged = [doc for doc in batch if self.cascade.policy.should_escalate(analysis.get(doc['id']))]
+        self.metrics.incr('cascade', 'screened', len(batch))
+        if flagged:
+            try:
+                escalated = self._label_batch(self.cascade.strong_model, self.cascade.strong_pm, flagged,
+                                              user_query, 'escalate', i)
+            except Exception as e:
+                # Keep the screening verdicts rather than losing the whole batch
+                self.metrics.incr('cascade', 'failed_escalations')
+                print(f"[V2] Escalation failed for batch {i}: {e}")
+                escalated = {}
+            # Only documents the strong model actually re-labeled count as escalated
+            flagged_ids = {doc['id'] for doc in flagged}
+            for doc_id, details in escalated.items():
+                analysis[doc_id] = dict(details, escalated=True)
+            self.metrics.incr('cascade', 'escalated', len(flagged_ids & escalated.keys()))
+        return analysis
+
     def _print_batch_labels(self, analysis: Dict[str, Any]):
         print("\n[V2] Labels for batch:")
         for doc_id, details in analysis.items():
             print(f"{doc_id}: {details.get('label')} (conf={details.get('confidence')})")
 
     def rank_results(self, analysis: Dict[str, Any], docs: Dict[str, Any]) -> List[str]:
-        tier = {"smoking_gun": 3, "strong": 2, "related": 1, "irrelevant": 0}
-
-        def _truthy(v) -> bool:
-            if isinstance(v, bool):
-                return v
-            if isinstance(v, (int, float)):
-                return v != 0
-            if isinstance(v, str):
-                return v.strip().lower() in {"true", "yes", "y", "1"}
-            return bool(v)
-
-        def facet_boost(d: Dict[str, Any]) -> float:
-            f = d.get("facets", {}) or {}
-            boost = 0.0
-            if _truthy(f.get("directive_language")):
-                boost += 0.05
-            if _truthy(f.get("budget_numbers")):
-                boost += 0.05
-            if _truthy(f.get("date_in_range")):
-                boost += 0.02
-            if _truthy(f.get("mentions_brands")):
-                boost += 0.02
-            dt_val = f.get("doc_type") or ""
-            if isinstance(dt_val, list):
-                dt = " ".join(str(x) for x in dt_val).lower()
-            else:
-                dt = str(dt_val).lower()
-            preferred = {"brand plan", "memo", "budget", "marketing document"}
-            if any(p in dt for p in preferred):
-                boost += 0.03
-            return boost
-
-        def key(doc_id: str):
-            d = analysis.get(doc_id, {})
-            label = d.get("label", "irrelevant")
-            conf = d.get("confidence", 0.0)
-            try:
-                conf_f = float(conf)
-            except Exception:
-                conf_f = 0.0
-            return (tier.get(label, 0), conf_f, facet_boost(d))
-        # Initial sort by tier, confidence, facet boost
-        ranked = sorted(analysis.keys(), key=key, reverse=True)
-
-        # Frequency tie-break within same label + confidence band
-        # Build frequency map from content_store title_hash (sum counts per normalized title)
-        title_counts: Dict[str, int] = {}
-        for doc_id, doc in docs.items():
-            title = doc.get('title') or ''
-            td = self.content_store.title_hash.get(title, {})
-            if isinstance(td, dict):
-                title_counts[doc_id] = sum(td.values())
-            else:
-                title_counts[doc_id] = 1
-
-        # Group by (tier, rounded confidence)
-        from collections import defaultdict
-        groups: Dict[tuple, list] = defaultdict(list)
-        for doc_id in ranked:
-            d = analysis.get(doc_id, {})
-            label = d.get('label', 'irrelevant')
-            try:
-                conf_f = float(d.get('confidence', 0.0))
-            except Exception:
-                conf_f = 0.0
-            band = round(conf_f, 2)
-            groups[(tier.get(label, 0), band)].append(doc_id)
-
-        # Reorder each group by frequency desc, stable to preserve previous ordering otherwise
-        final_list: list = []
-        for key_group in sorted(groups.keys(), reverse=True):
-            ids = groups[key_group]
-            ids_sorted = sorted(ids, key=lambda i: title_counts.get(i, 0), reverse=True)
-            final_list.extend(ids_sorted)
-
-        # Final collapse: deduplicate by normalized title, then by OCR fingerprint similarity
-        def clean_text(s: str) -> str:
-            s = s or ""
-            s = ''.join(ch.lower() if (ch.isalnum() or ch.isspace()) else ' ' for ch in s)
-            return ' '.join(s.split())
-
-        def shingles(s: str, k: int = 5, window: int = 5000) -> set:
-            s = clean_text(s)[:window]
-            if len(s) < k:
-                return set()
-            return {s[i:i+k] for i in range(len(s) - k + 1)}
-
-        def jaccard(a: set, b: set) -> float:
-            if not a or not b:
-                return 0.0
-            inter = len(a & b)
-            if inter == 0:
-                return 0.0
-            union = len(a | b)
-            return inter / union if union else 0.0
-
-        seen_titles: set = set()
-        kept: list = []
-        kept_shingles: list[set] = []
-        THRESH = 0.92
-
-        for doc_id in final_list:
-            doc = docs.get(doc_id) or {}
-            title = (doc.get('title') or '').strip()
-
-            # Title-based collapse (skip empty or '(untitled)')
-            if title and title != '(untitled)':
-                if title in seen_titles:
-                    continue
-
-            # OCR-based collapse
-            ocr = doc.get('ocr_text') or ''
-            cur_sh = shingles(ocr)
-            is_dup = False
-            for prev in kept_shingles:
-                if jaccard(cur_sh, prev) >= THRESH:
-                    is_dup = True
-                    break
-            if is_dup:
-                continue
-
-            kept.append(doc_id)
-            kept_shingles.append(cur_sh)
-            if title and title != '(untitled)':
-                seen_titles.add(title)
-
+        with self.metrics.stage('rank', docs=len(analysis)):
+            return self._rank_results(analysis, docs)
+
+    def _rank_results(self, analysis: Dict[str, Any], docs: Dict[str, Any]) -> List[str]:
+        # Reuse the ranker fed batch by batch when it holds exactly these verdicts; otherwise build one
+        ranker = self.ranker
+        if ranker is None or ranker.docs is not docs or not ranker.covers(analysis):
+            ranker = IncrementalRanker(docs, self.content_store.frequency)
+            ranker.update(analysis)
+            self.ranker = ranker
+        with self.metrics.stage('dedup', candidates=len(analysis)):
+            kept = ranker.ranked()
+        self.metrics.incr('dedup', 'collapsed', len(analysis) - len(kept))
         return kept
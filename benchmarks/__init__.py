@@ -0,0 +1 @@
+# Offline benchmark harness (local Solr/OCR/LLM stand-ins)
@@ -0,0 +1,168 @@
+"""
+Equivalence check and benchmark for IncrementalRanker (ranking.py) against the original
+sort-then-group ranking (copied from AnalyzerV2._rank_results before ranking.py).
+
+Random verdicts with duplicate titles, near-duplicate OCR and tied confidences arrive
+in random batches. After every batch the provisional top-N must match the original
+ranking of the verdicts so far, and at the end the full ranking must match as well.
+Then it times a provisional top-N after every batch with the walk kept between calls,
+against a fresh dedup walk per call (the ranker before it kept its walk).
+
+Run:
+    python benchmarks/bench_rank.py
+    python benchmarks/bench_rank.py --trials 50 --docs 300 --bench-docs 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import fake_ocr_text
+from preprocess import ensure_preprocessed, near_duplicate
+from ranking import TIER, IncrementalRanker, _confidence, facet_boost
+
+
+def legacy_rank(analysis, docs, frequency):
+    """The original ranking: sort by (tier, confidence, boost), regroup by confidence band and
+    frequency, then drop same-title and near-duplicate documents"""
+    def key(doc_id):
+        d = analysis.get(doc_id, {})
+        return (TIER.get(d.get("label", "irrelevant"), 0), _confidence(d), facet_boost(d))
+    ranked = sorted(analysis.keys(), key=key, reverse=True)
+    counts = {doc_id: frequency(doc) for doc_id, doc in docs.items()}
+    groups = defaultdict(list)
+    for doc_id in ranked:
+        d = analysis.get(doc_id, {})
+        groups[(TIER.get(d.get('label', 'irrelevant'), 0), round(_confidence(d), 2))].append(doc_id)
+    final_list = []
+    for group in sorted(groups.keys(), reverse=True):
+        final_list.extend(sorted(groups[group], key=lambda i: counts.get(i, 0), reverse=True))
+
+    seen_titles, kept, kept_fingerprints = set(), [], []
+    for doc_id in final_list:
+        doc = docs.get(doc_id) or {}
+        title = (doc.get('title') or '').strip()
+        titled = bool(title) and title != '(untitled)'
+        if titled and title in seen_titles:
+            continue
+        fp = ensure_preprocessed(doc).get('fingerprint') or frozenset()
+        if any(near_duplicate(fp, prev, 0.92) for prev in kept_fingerprints):
+            continue
+        kept.append(doc_id)
+        kept_fingerprints.append(fp)
+        if titled:
+            seen_titles.add(title)
+    return kept
+
+
+def _mutate(text: str, rng: random.Random, edits: int) -> str:
+    chars = list(text)
+    for _ in range(edits):
+        chars[rng.randrange(len(chars))] = rng.choice('abcdefghij ')
+    return ''.join(chars)
+
+
+def make_run(n: int, seed: int, ocr_size: int = 3000):
+    """Documents, per-document frequencies and verdicts (in arrival order)"""
+    rng = random.Random(seed)
+    bases = [fake_ocr_text(f"{seed}-{i}", ocr_size) for i in range(max(1, n // 3))]
+    docs, freq, verdicts = {}, {}, []
+    for i in range(n):
+        doc_id = f"d{seed}x{i}"
+        base = rng.choice(bases)
+        text = _mutate(base, rng, rng.choice([0, 5, 200])) if rng.random() < 0.6 else fake_ocr_text(doc_id, ocr_size)
+        title = rng.choice(['', '(untitled)', f"title {rng.randrange(n // 4 + 1)}", f"unique {i}"])
+        docs[doc_id] = {'id': doc_id, 'title': title or '(untitled)', 'ocr_text': text if rng.random() > 0.05 else ''}
+        freq[doc_id] = rng.randrange(1, 4)
+        verdicts.append((doc_id, {
+            'label': rng.choice(list(TIER)),
+            'confidence': rng.choice([0.5, 0.7, 0.9, round(rng.random(), 3)]),
+            'facets': {'budget_numbers': rng.random() < 0.3, 'doc_type': rng.choice(['Memo', 'Report'])},
+        }))
+    return docs, freq, verdicts
+
+
+def _batches(verdicts, rng: random.Random):
+    i = 0
+    while i < len(verdicts):
+        size = rng.randint(1, 8)
+        yield dict(verdicts[i:i + size])
+        i += size
+
+
+def check(trials: int, n: int):
+    for seed in range(trials):
+        docs, freq, verdicts = make_run(n, seed)
+        frequency = lambda doc: freq[doc['id']]
+        rng = random.Random(seed)
+        ranker = IncrementalRanker(docs, frequency)
+        analysis = {}
+        for batch in _batches(verdicts, rng):
+            if analysis and rng.random() < 0.1:
+                # Occasionally re-label an earlier document (replaced verdict)
+                doc_id = rng.choice(list(analysis))
+                batch[doc_id] = dict(analysis[doc_id], label=rng.choice(list(TIER)))
+            analysis.update(batch)
+            ranker.update(batch)
+            k = rng.randint(1, 10)
+            expected = legacy_rank(analysis, docs, frequency)
+            assert ranker.top(k) == expected[:k], f"seed {seed}: provisional top-{k} mismatch"
+        expected = legacy_rank(analysis, docs, frequency)
+        assert ranker.ranked() == expected, f"seed {seed}: final ranking mismatch"
+        clusters = ranker.clusters()
+        assert set(clusters) == set(analysis) and all(clusters[d] == d for d in expected), \
+            f"seed {seed}: cluster mismatch"
+        assert all(clusters[head] == head for head in clusters.values()), f"seed {seed}: cluster head not kept"
+    print(f"IncrementalRanker matches the original ranking: {trials} runs of {n} documents")
+
+
+def bench(n: int, top_n: int):
+    docs, freq, verdicts = make_run(n, 12345, ocr_size=5000)
+    for doc in docs.values():
+        ensure_preprocessed(doc)
+    frequency = lambda doc: freq[doc['id']]
+    batches = [dict(verdicts[i:i + 5]) for i in range(0, n, 5)]
+
+    start = time.perf_counter()
+    ranker = IncrementalRanker(docs, frequency)
+    for batch in batches:
+        ranker.update(batch)
+        ranker.top(top_n)
+    ranker.ranked()
+    ranker.clusters()
+    incremental_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ranker = IncrementalRanker(docs, frequency)
+    for batch in batches:
+        ranker.update(batch)
+        ranker._index = None  # force a new index and walk, as every call used to do
+        ranker.top(top_n)
+    ranker._index = None
+    ranker.ranked()
+    ranker._index = None
+    ranker.clusters()
+    rebuild_s = time.perf_counter() - start
+    print(f"{n} documents in {len(batches)} batches, top-{top_n} after each: "
+          f"kept walk {incremental_s:.2f}s, fresh walk per call {rebuild_s:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IncrementalRanker equivalence check and benchmark")
+    parser.add_argument('--trials', type=int, default=10)
+    parser.add_argument('--docs', type=int, default=100, help='Documents per equivalence trial')
+    parser.add_argument('--bench-docs', type=int, default=1000)
+    parser.add_argument('--top', type=int, default=5)
+    args = parser.parse_args()
+    check(args.trials, args.docs)
+    bench(args.bench_docs, args.top)
+
+
+if __name__ == "__main__":
+    main()
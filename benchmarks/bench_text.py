@@ -0,0 +1,147 @@
+"""
+Micro-benchmarks for the text work in ranking and ingest: the original per-character
+implementations (copied from rank_results / UCSFContentStore before preprocess.py)
+against the preprocess.py versions, at 1k and 10k documents.
+
+Run:
+    python benchmarks/bench_text.py
+    python benchmarks/bench_text.py --docs 1000 --ocr-size 20000 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import preprocess
+from benchmarks.fakes import FakeCorpus, fake_ocr_text
+
+
+# --- Original implementations -------------------------------------------------
+
+def legacy_clean_text(s: str) -> str:
+    s = s or ""
+    s = ''.join(ch.lower() if (ch.isalnum() or ch.isspace()) else ' ' for ch in s)
+    return ' '.join(s.split())
+
+
+def legacy_shingles(s: str, k: int = 5, window: int = 5000) -> set:
+    s = legacy_clean_text(s)[:window]
+    if len(s) < k:
+        return set()
+    return {s[i:i + k] for i in range(len(s) - k + 1)}
+
+
+def legacy_jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    if inter == 0:
+        return 0.0
+    union = len(a | b)
+    return inter / union if union else 0.0
+
+
+def legacy_normalize_title(title: str) -> str:
+    normalized = ''.join(c.lower() for c in (title or '') if c.isalnum() or c.isspace())
+    tokens = normalized.split()
+    merged: list[str] = []
+    buf = []
+    for tok in tokens:
+        if len(tok) == 1:
+            buf.append(tok)
+        else:
+            if buf:
+                merged.append(''.join(buf))
+                buf = []
+            merged.append(tok)
+    if buf:
+        merged.append(''.join(buf))
+    return ' '.join(merged)
+
+
+def legacy_dedup(fingerprints, thresh: float = 0.92) -> int:
+    kept = []
+    for fp in fingerprints:
+        if any(legacy_jaccard(fp, prev) >= thresh for prev in kept):
+            continue
+        kept.append(fp)
+    return len(kept)
+
+
+def dedup(fingerprints, thresh: float = 0.92) -> int:
+    kept = []
+    for fp in fingerprints:
+        if any(preprocess.near_duplicate(fp, prev, thresh) for prev in kept):
+            continue
+        kept.append(fp)
+    return len(kept)
+
+
+# --- Harness --------------------------------------------------------------------
+
+def _time(fn, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def _row(name: str, n: int, old_s: float, new_s: float):
+    speedup = old_s / new_s if new_s else float('inf')
+    print(f"  {name:<22} {old_s * 1000:10.1f} {new_s * 1000:10.1f} {old_s / n * 1e6:9.1f} "
+          f"{new_s / n * 1e6:9.1f} {speedup:8.1f}x")
+
+
+def run(n: int, ocr_size: int, workers: int, dedup_docs: int):
+    corpus = FakeCorpus(size=n, duplicate_title_rate=0.1)
+    texts = [fake_ocr_text(d['id'], ocr_size) for d in corpus.docs]
+    # Punctuation and mixed case so cleaning has work to do
+    texts = [t.replace(' ', ', ', 50).title() for t in texts]
+    titles = [d['title'] for d in corpus.docs]
+
+    print(f"\n{n} documents, {ocr_size} OCR chars each")
+    print(f"  {'function':<22} {'old ms':>10} {'new ms':>10} {'old us/doc':>9} {'new us/doc':>9} {'speedup':>9}")
+
+    old_s, old = _time(lambda: [legacy_normalize_title(t) for t in titles])
+    new_s, new = _time(lambda: [preprocess.normalize_title(t) for t in titles])
+    assert old == new, "normalize_title mismatch"
+    _row('normalize_title', n, old_s, new_s)
+
+    old_s, old = _time(lambda: [legacy_clean_text(t) for t in texts])
+    new_s, new = _time(lambda: [preprocess.clean_text(t) for t in texts])
+    assert old == new, "clean_text mismatch"
+    _row('clean_text', n, old_s, new_s)
+
+    old_s, old_fps = _time(lambda: [legacy_shingles(t) for t in texts])
+    new_s, new_fps = _time(lambda: [preprocess.preprocess_text(t)['fingerprint'] for t in texts])
+    assert [len(a) for a in old_fps] == [len(b) for b in new_fps], "fingerprint size mismatch"
+    _row('shingles/fingerprint', n, old_s, new_s)
+
+    m = min(n, dedup_docs)
+    old_s, old_kept = _time(legacy_dedup, old_fps[:m])
+    new_s, new_kept = _time(dedup, new_fps[:m])
+    assert old_kept == new_kept, "dedup mismatch"
+    _row(f'dedup ({m} docs)', m, old_s, new_s)
+
+    inline_s, _ = _time(preprocess.preprocess_records, [{'ocr_text': t} for t in texts], 1)
+    pool_s, _ = _time(preprocess.preprocess_records, [{'ocr_text': t} for t in texts], workers, 0)
+    print(f"  preprocess_records: inline {inline_s * 1000:.1f} ms, {workers}-process pool {pool_s * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text preprocessing micro-benchmarks")
+    parser.add_argument('--docs', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--ocr-size', type=int, default=20000, help='OCR characters per document')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--dedup-docs', type=int, default=300,
+                        help='Cap for the quadratic dedup comparison (the legacy version is slow)')
+    args = parser.parse_args()
+    for n in args.docs:
+        run(n, args.ocr_size, args.workers, args.dedup_docs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Local stand-ins for the UCSF Solr endpoint, the OCR file host and Gemini.
+
+Everything is deterministic: the same query, page and document ID always
+produce the same bytes, so benchmark numbers only move when the pipeline does.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DOC_TYPES = ["Memo", "Letter", "Report", "Brand Plan", "Budget", "Email", "Marketing Document", "News Article"]
+COLLECTIONS = ["Master Settlement Agreement", "Topical Collections", "Additional Tobacco Documents"]
+BRANDS = ["Camel", "Winston", "Salem", "Marlboro", "Newport", "Kool", "Virginia Slims"]
+LABELS = ["smoking_gun", "strong", "related", "irrelevant", "irrelevant", "irrelevant"]
+WORDS = ("youth marketing brand plan budget memo campaign smokers menthol women teen research sales "
+         "program consumer retail promotion segment target image advertising study survey").split()
+
+
+def _seed(*parts) -> int:
+    return int.from_bytes(hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).digest()[:8], 'big')
+
+
+def make_doc_id(i: int) -> str:
+    rng = random.Random(_seed('doc', i))
+    return ''.join(rng.choice('bcdfghjklmnpqrstvwxyz') for _ in range(4)) + f"{i:04d}"
+
+
+class FakeCorpus:
+    """A fixed pool of documents with metadata; each query sees a deterministic permutation of it."""
+
+    def __init__(self, size: int = 5000, duplicate_title_rate: float = 0.1):
+        self.docs = []
+        for i in range(size):
+            rng = random.Random(_seed('meta', i))
+            # A share of documents reuse an earlier title to exercise title dedup
+            title_src = rng.randrange(max(i, 1)) if i and rng.random() < duplicate_title_rate else i
+            year = 1970 + rng.randrange(45)
+            self.docs.append({
+                'id': make_doc_id(i),
+                'title': f"R. J. Reynolds {WORDS[title_src % len(WORDS)]} document {title_src}",
+                'type': rng.choice(DOC_TYPES),
+                'dt': None,
+                'documentdateiso': f"{year}-{1 + rng.randrange(12):02d}-01T00:00:00Z",
+                'bates': f"{500000000 + i}",
+                'pages': 1 + rng.randrange(40),
+                'collection': rng.choice(COLLECTIONS),
+                'brand': rng.choice(BRANDS),
+                'availability': 'public',
+            })
+            self.docs[-1]['dt'] = self.docs[-1]['type']
+        self._order_cache = {}
+
+    def ranked_for(self, q: str):
+        """Documents matching `q`, best first, with a synthetic score"""
+        if q not in self._order_cache:
+            rng = random.Random(_seed('q', q))
+            order = list(range(len(self.docs)))
+            rng.shuffle(order)
+            self._order_cache[q] = [(self.docs[i], 10.0 / (1 + rank)) for rank, i in enumerate(order)]
+        return self._order_cache[q]
+
+
+def _fq_matches(doc: dict, fq: str) -> bool:
+    """Small subset of Solr fq syntax: field:value, field:"value", field:[A TO B], id:(a OR b), (x OR y)"""
+    fq = fq.strip()
+    if fq.startswith('{!'):
+        # Local params (e.g. collapse) are handled by the server, not per document
+        return True
+    if fq.startswith('(') and fq.endswith(')') and ':(' not in fq[:fq.find(')')]:
+        return any(_fq_matches(doc, part) for part in fq[1:-1].split(' OR '))
+    field, _, value = fq.partition(':')
+    value = value.strip()
+    actual = doc.get(field)
+    if value.startswith('(') and value.endswith(')'):
+        return str(actual) in {v.strip().strip('"') for v in value[1:-1].split(' OR ')}
+    if value.startswith('[') and value.endswith(']'):
+        lo, _, hi = value[1:-1].partition(' TO ')
+        return actual is not None and (lo.strip() == '*' or str(actual) >= lo.strip()) \
+            and (hi.strip() == '*' or str(actual) <= hi.strip())
+    return str(actual) == value.strip('"')
+
+
+_ATTEMPTS_LOCK = threading.Lock()
+
+
+class FakeSolrHandler(BaseHTTPRequestHandler):
+    corpus: FakeCorpus = None
+    latency_s: float = 0.0
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = parse_qs(parsed.query)
+        one = lambda k, d=None: params.get(k, [d])[0]
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        q = one('q', '*:*')
+        fqs = params.get('fq', [])
+        rows = min(int(one('rows', '10')), 100)  # the real endpoint caps pages at 100
+        fl = [f for f in (one('fl') or '').split(',') if f]
+        hits = [(d, s) for d, s in self.corpus.ranked_for(q) if all(_fq_matches(d, fq) for fq in fqs)]
+        collapse = next((re.search(r'field=(\S+?)[\s}]', fq) for fq in fqs if fq.startswith('{!collapse')), None)
+        group_sizes = {}
+        if collapse:
+            # Keep the best-scoring document per group value, like Solr's collapse parser
+            field = collapse.group(1)
+            heads = []
+            for d, s in hits:
+                value = d.get(field)
+                if value is None:
+                    heads.append((d, s))
+                elif value in group_sizes:
+                    group_sizes[value] += 1
+                else:
+                    group_sizes[value] = 0
+                    heads.append((d, s))
+            hits = heads
+
+        cursor = one('cursorMark')
+        if cursor is not None:
+            start = 0 if cursor == '*' else int(cursor.lstrip('C'))
+        else:
+            start = int(one('start', '0'))
+        page = hits[start:start + rows]
+        docs = []
+        for d, score in page:
+            out = dict(d, score=score, ti=d['title'])
+            docs.append({k: v for k, v in out.items() if not fl or k in fl})
+        body = {'responseHeader': {'status': 0}, 'response': {'numFound': len(hits), 'start': start, 'docs': docs}}
+        if one('facet') == 'true':
+            body['facet_counts'] = {'facet_fields': {f: self._facet(hits, f) for f in params.get('facet.field', [])}}
+        if cursor is not None:
+            body['nextCursorMark'] = f"C{start + len(page)}" if page else cursor
+        if collapse and one('expand') == 'true':
+            field = collapse.group(1)
+            body['expanded'] = {str(d[field]): {'numFound': group_sizes[d[field]], 'start': 0, 'docs': []}
+                                for d, _ in page if d.get(field) in group_sizes and group_sizes[d[field]]}
+        self._send_json(body)
+
+    @staticmethod
+    def _facet(hits, field):
+        """Solr's flat [value, count, ...] facet list, most frequent first"""
+        counts = {}
+        for d, _ in hits:
+            if d.get(field) is not None:
+                counts[d[field]] = counts.get(d[field], 0) + 1
+        flat = []
+        for value, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])):
+            flat.extend([value, n])
+        return flat
+
+    def _send_json(self, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def fake_ocr_text(doc_id: str, size_chars: int = 4000) -> str:
+    """Deterministic OCR-like text for a document ID"""
+    rng = random.Random(_seed('ocr-text', doc_id))
+    words = []
+    total = 0
+    while total < size_chars:
+        w = rng.choice(WORDS) + ('' if rng.random() < 0.7 else str(rng.randrange(1000)))
+        words.append(w)
+        total += len(w) + 1
+    return ' '.join(words)[:size_chars]
+
+
+class FakeOCRHandler(BaseHTTPRequestHandler):
+    latency_s: float = 0.0
+    jitter_s: float = 0.0
+    size_chars: int = 4000
+    # Transient stalls: this share of requests takes tail_s extra. Decided per (doc, attempt),
+    # so a retried or hedged request for the same document is usually fast.
+    tail_rate: float = 0.0
+    tail_s: float = 0.0
+    attempts: dict = None
+
+    def do_GET(self):
+        doc_id = self.path.rstrip('/').rsplit('/', 1)[-1].replace('.ocr', '')
+        rng = random.Random(_seed('ocr', doc_id))
+        delay = self.latency_s + (rng.random() * self.jitter_s if self.jitter_s else 0.0)
+        if self.tail_rate:
+            with _ATTEMPTS_LOCK:
+                attempt = self.attempts[doc_id] = self.attempts.get(doc_id, 0) + 1
+            if random.Random(_seed('tail', doc_id, attempt)).random() < self.tail_rate:
+                delay += self.tail_s
+        if delay:
+            time.sleep(delay)
+        data = fake_ocr_text(doc_id, self.size_chars).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class _BackgroundServer:
+    def __init__(self, handler):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def fake_solr_server(corpus: FakeCorpus, latency_s: float = 0.0) -> _BackgroundServer:
+    handler = type('Solr', (FakeSolrHandler,), {'corpus': corpus, 'latency_s': latency_s})
+    return _BackgroundServer(handler)
+
+
+def fake_ocr_server(latency_s: float = 0.0, jitter_s: float = 0.0, size_chars: int = 4000,
+                    tail_rate: float = 0.0, tail_s: float = 0.0) -> _BackgroundServer:
+    handler = type('OCR', (FakeOCRHandler,), {'latency_s': latency_s, 'jitter_s': jitter_s, 'size_chars': size_chars,
+                                              'tail_rate': tail_rate, 'tail_s': tail_s, 'attempts': {}})
+    return _BackgroundServer(handler)
+
+
+class _Usage:
+    def __init__(self, prompt: str, text: str):
+        self.prompt_token_count = len(prompt) // 4
+        self.candidates_token_count = len(text) // 4
+        self.total_token_count = self.prompt_token_count + self.candidates_token_count
+
+
+class _Response:
+    def __init__(self, prompt: str, text: str):
+        self.text = text
+        self.usage_metadata = _Usage(prompt, text)
+
+
+class FakeModel:
+    """Deterministic stand-in for genai.GenerativeModel.generate_content"""
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt: str):
+        with self._lock:
+            self.calls += 1
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        ids = re.findall(r'Document ID: (\S+)', prompt)
+        if not ids:
+            rng = random.Random(_seed('strategies', prompt))
+            strategies = [{'search_terms': ' '.join(rng.sample(WORDS, 3)), 'rationale': 'benchmark'} for _ in range(3)]
+            return _Response(prompt, json.dumps({'strategies': strategies}))
+        if 'summary' in prompt.lower() and 'label' not in prompt:
+            return _Response(prompt, f"[{ids[0]}]: Deterministic benchmark summary. " * 5)
+        out = {}
+        if 'relevance score (0-10)' in prompt:
+            # Legacy v1 prompt: a 0-10 score loosely tracking the v2 label of the same document
+            for doc_id in ids:
+                label = random.Random(_seed('verdict', doc_id)).choice(LABELS)
+                low = {'irrelevant': 0, 'related': 3, 'strong': 6, 'smoking_gun': 8}[label]
+                rng = random.Random(_seed('score', doc_id))
+                out[doc_id] = {'score': min(10, low + rng.randrange(4)),
+                               'entities': {'people': [], 'projects': [], 'products': [rng.choice(BRANDS)],
+                                            'terms': ['youth'], 'dates': []}}
+            return _Response(prompt, json.dumps(out))
+        for doc_id in ids:
+            rng = random.Random(_seed('verdict', doc_id))
+            out[doc_id] = {
+                'label': rng.choice(LABELS),
+                'confidence': round(0.3 + rng.random() * 0.7, 2),
+                'tie_break_score': rng.randrange(4),
+                'evidence': [{'quote': 'target young adult smokers', 'start': 10, 'end': 36}],
+                'reasons': 'benchmark verdict',
+                'facets': {
+                    'doc_type': rng.choice(DOC_TYPES),
+                    'date_in_range': rng.random() < 0.5,
+                    'mentions_brands': [rng.choice(BRANDS)],
+                    'targets_group': ['youth'],
+                    'budget_numbers': rng.random() < 0.3,
+                    'directive_language': rng.random() < 0.3,
+                    'explicit_target_terms': [],
+                },
+            }
+        return _Response(prompt, json.dumps(out))
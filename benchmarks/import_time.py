@@ -0,0 +1,93 @@
+"""
+Import-time regression check for the entry points, based on `python -X importtime`.
+
+Each entry module is imported in a fresh interpreter several times; the median
+cumulative import time must stay under the budget and heavy SDKs must not be
+imported eagerly. Exits non-zero on a regression.
+
+Run:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --budget-ms 80 --repeat 7 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+ENTRY_MODULES = ["main", "legacy_v1.main_v1", "service"]
+# Must only load on first use
+LAZY_MODULES = ["google.generativeai", "requests", "dotenv"]
+DEFAULT_BUDGET_MS = 100.0
+
+
+def measure(module: str) -> tuple[float, dict[str, int], set[str]]:
+    """Import `module` once under -X importtime; returns (cumulative ms, per-module cumulative us, modules)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows: list[tuple[int, str, int]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            continue  # header line
+        raw = parts[2].rstrip()
+        depth = (len(raw) - len(raw.lstrip())) // 2
+        rows.append((depth, raw.strip(), cumulative))
+
+    # -X importtime prints children before their parent; keep only the entry module's
+    # subtree so interpreter startup (site, .pth hooks) doesn't count against it
+    per_module: dict[str, int] = {}
+    for idx in range(len(rows) - 1, -1, -1):
+        if rows[idx][1] == module and rows[idx][0] == 0:
+            per_module[module] = rows[idx][2]
+            j = idx - 1
+            while j >= 0 and rows[j][0] > 0:
+                per_module.setdefault(rows[j][1], rows[j][2])
+                j -= 1
+            break
+    return per_module.get(module, 0) / 1000.0, per_module, set(per_module)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark with a regression budget")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Max median cumulative import time per entry module (default {DEFAULT_BUDGET_MS})')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Show the N slowest imports per entry module')
+    parser.add_argument('modules', nargs='*', default=ENTRY_MODULES)
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        samples = []
+        per_module: dict[str, int] = {}
+        loaded: set[str] = set()
+        for _ in range(args.repeat):
+            total_ms, per_module, loaded = measure(module)
+            samples.append(total_ms)
+        median_ms = statistics.median(samples)
+        eager = [m for m in LAZY_MODULES if m in loaded]
+        ok = median_ms <= args.budget_ms and not eager
+        failed = failed or not ok
+        print(f"\n{module}: median {median_ms:.1f} ms over {args.repeat} runs "
+              f"(budget {args.budget_ms:.0f} ms) {'OK' if ok else 'REGRESSION'}")
+        if eager:
+            print(f"  eagerly imported: {', '.join(eager)}")
+        for name, us in sorted(per_module.items(), key=lambda kv: kv[1], reverse=True)[1:args.top + 1]:
+            print(f"  {us / 1000.0:8.1f} ms  {name}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
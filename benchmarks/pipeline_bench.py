@@ -0,0 +1,116 @@
+"""
+Offline end-to-end benchmark of the v2 pipeline (main.py flow) against local
+Solr/OCR/LLM stand-ins. No network access or API key is needed.
+
+Run:
+    python benchmarks/pipeline_bench.py                    # 10/100/1000 rows per strategy
+    python benchmarks/pipeline_bench.py --rows 10 100 --ocr-latency-ms 20 --json bench.json
+    OCR_HEDGE=true python benchmarks/pipeline_bench.py --rows 100 --ocr-tail-rate 0.05 --ocr-tail-ms 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeCorpus, FakeModel, fake_ocr_server, fake_solr_server
+from metrics import RunMetrics, percentile
+
+QUERY = "youth women marketing tobacco"
+
+
+def run_scenario(rows: int, solr_url: str, ocr_url: str, model_latency_s: float,
+                 top_summarize: int = 3, env: dict | None = None) -> dict:
+    """One main.py-equivalent run (strategies -> search -> OCR -> analyze -> rank -> summarize)"""
+    os.environ['SOLR_BASE_URL'] = solr_url
+    os.environ['OCR_BASE'] = ocr_url
+    for k, v in (env or {}).items():
+        os.environ[k] = v
+    # Imported late so the environment above is seen by the pipeline modules
+    from pipeline import generate_strategies, analyze_and_rank, summarize_ranked
+
+    model = FakeModel(latency_s=model_latency_s)
+    metrics = RunMetrics()
+    start = time.perf_counter()
+    strategies = generate_strategies(model, QUERY, metrics=metrics)
+    result = analyze_and_rank(model, QUERY, strategies, [], rows, metrics=metrics)
+    summarize_ranked(model, QUERY, result['analysis'], result['docs'], result['ranked'], top_summarize, metrics=metrics)
+    elapsed = time.perf_counter() - start
+
+    durations = defaultdict(list)
+    for ev in metrics.trace_events:
+        durations[ev['name']].append(ev['dur'] / 1000.0)
+    stages = {}
+    for name, vals in metrics.report()['stages'].items():
+        lat = durations.get(name, [])
+        stages[name] = dict(vals, p50_ms=percentile(lat, 0.50), p95_ms=percentile(lat, 0.95),
+                            mean_ms=statistics.fmean(lat) if lat else 0.0)
+    docs = len(result['docs'])
+    return {
+        'rows_per_strategy': rows,
+        'strategies': len(strategies),
+        'documents': docs,
+        'ranked': len(result['ranked']),
+        'llm_calls': model.calls,
+        'elapsed_s': elapsed,
+        'docs_per_s': docs / elapsed if elapsed else 0.0,
+        'stages': stages,
+    }
+
+
+def print_scenario(r: dict):
+    print(f"\n=== rows/strategy={r['rows_per_strategy']}: {r['documents']} docs, {r['llm_calls']} LLM calls, "
+          f"{r['elapsed_s']:.2f}s end-to-end ({r['docs_per_s']:.1f} docs/s)")
+    print(f"  {'stage':<18}{'spans':>7}{'total s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, vals in sorted(r['stages'].items()):
+        print(f"  {name:<18}{int(vals.get('calls', 0)):>7}{vals.get('wall_time_s', 0.0):>10.3f}"
+              f"{vals['p50_ms']:>10.2f}{vals['p95_ms']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark with local Solr/OCR/LLM stand-ins")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10, 100, 1000], help='Rows per strategy scenarios')
+    parser.add_argument('--corpus-size', type=int, default=5000)
+    parser.add_argument('--solr-latency-ms', type=float, default=5.0)
+    parser.add_argument('--ocr-latency-ms', type=float, default=2.0)
+    parser.add_argument('--ocr-jitter-ms', type=float, default=0.0)
+    parser.add_argument('--ocr-tail-rate', type=float, default=0.0,
+                        help='Share of OCR requests that stall (retries/hedges of the same doc usually do not)')
+    parser.add_argument('--ocr-tail-ms', type=float, default=0.0, help='Extra latency of a stalled OCR request')
+    parser.add_argument('--ocr-size', type=int, default=4000, help='OCR characters per document')
+    parser.add_argument('--model-latency-ms', type=float, default=0.0)
+    parser.add_argument('--json', metavar='PATH', help='Write all scenario results as JSON')
+    args = parser.parse_args()
+
+    corpus = FakeCorpus(size=args.corpus_size)
+    results = []
+    with fake_solr_server(corpus, latency_s=args.solr_latency_ms / 1000.0) as solr, \
+            fake_ocr_server(latency_s=args.ocr_latency_ms / 1000.0, jitter_s=args.ocr_jitter_ms / 1000.0,
+                            size_chars=args.ocr_size, tail_rate=args.ocr_tail_rate,
+                            tail_s=args.ocr_tail_ms / 1000.0) as ocr:
+        for rows in args.rows:
+            # Silence per-document pipeline prints so the report stays readable
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, 'w')
+            try:
+                r = run_scenario(rows, solr.url, ocr.url, args.model_latency_ms / 1000.0)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            print_scenario(r)
+            results.append(r)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
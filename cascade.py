@@ -0,0 +1,102 @@
+import os
+import re
+from typing import Any, Dict, List
+
+from preprocess import snippet
+
+# Words that carry no topical signal for the heuristic screen
+_STOPWORDS = {
+    'the', 'and', 'for', 'with', 'from', 'that', 'this', 'into', 'about', 'their', 'were', 'was',
+    'are', 'how', 'what', 'which', 'who', 'why', 'did', 'does', 'tobacco', 'industry', 'documents',
+}
+
+
+class EscalationPolicy:
+    """Decides which screening verdicts are re-evaluated by the stronger model.
+
+    A verdict escalates when its label is in `labels` (default strong, smoking_gun)
+    or its confidence is below `min_confidence`. Documents the screener returned
+    no verdict for always escalate.
+    """
+
+    def __init__(self, labels: List[str] | None = None, min_confidence: float | None = None):
+        if labels is None:
+            labels = os.getenv("CASCADE_ESCALATE_LABELS", "strong,smoking_gun").split(',')
+        self.labels = {label.strip() for label in labels if label.strip()}
+        self.min_confidence = min_confidence if min_confidence is not None \
+            else float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.7"))
+
+    def should_escalate(self, verdict: Dict[str, Any] | None) -> bool:
+        if not verdict:
+            return True
+        try:
+            conf = float(verdict.get('confidence', 0.0))
+        except (TypeError, ValueError):
+            conf = 0.0
+        return verdict.get('label') in self.labels or conf < self.min_confidence
+
+
+class HeuristicScreener:
+    """Local stand-in for a screening model: query-term overlap with title and OCR.
+
+    Documents that share no query term are labeled irrelevant with high confidence and settle.
+    Everything else is `related` with confidence 0.3 + 0.3 × (share of query terms matched),
+    which stays below the default 0.7 threshold, so every matching document escalates.
+    """
+
+    def __init__(self, max_chars: int = 3000, irrelevant_confidence: float = 0.9):
+        self.max_chars = max_chars
+        self.irrelevant_confidence = irrelevant_confidence
+
+    @staticmethod
+    def _terms(text: str) -> set:
+        return {w for w in re.findall(r'[a-z]{3,}', (text or '').lower()) if w not in _STOPWORDS}
+
+    def screen(self, batch: List[Dict[str, Any]], user_query: str) -> Dict[str, Any]:
+        query_terms = self._terms(user_query)
+        out: Dict[str, Any] = {}
+        for doc in batch:
+            doc_terms = self._terms(f"{doc.get('title') or ''} {snippet(doc, self.max_chars)}")
+            matched = len(query_terms & doc_terms)
+            ratio = matched / len(query_terms) if query_terms else 0.0
+            out[doc['id']] = {
+                'label': 'irrelevant' if matched == 0 else 'related',
+                'confidence': self.irrelevant_confidence if matched == 0 else round(0.3 + 0.3 * ratio, 2),
+                'tie_break_score': 0,
+                'evidence': [],
+                'reasons': f"heuristic screen: {matched}/{len(query_terms)} query terms",
+                'facets': {},
+            }
+        return out
+
+
+class ModelCascade:
+    """Two-tier evaluation: a cheap screener labels every document, then only verdicts the
+    policy flags are re-labeled by `strong_model` with a larger per-document context budget.
+
+    `screener` is None (use the analyzer's own model and prompt manager) or an object with
+    `screen(batch, user_query)` such as HeuristicScreener.
+    """
+
+    def __init__(self, strong_model, strong_prompt_manager, policy: EscalationPolicy | None = None, screener=None):
+        self.strong_model = strong_model
+        self.strong_pm = strong_prompt_manager
+        self.policy = policy or EscalationPolicy()
+        self.screener = screener
+
+    @classmethod
+    def from_env(cls, create_model, prompt_manager_cls, screener: str | None = None) -> 'ModelCascade | None':
+        """Enabled by MODEL_CASCADE=true or an explicit `screener` ("model" or "heuristic").
+        CASCADE_STRONG_MODEL (default gemini-2.5-flash), CASCADE_STRONG_MAX_CHARS (default 12000),
+        CASCADE_SCREENER=model|heuristic (default model)."""
+        if screener is None:
+            if os.getenv("MODEL_CASCADE", "false").strip().lower() not in {"1", "true", "yes", "y"}:
+                return None
+            screener = os.getenv("CASCADE_SCREENER", "model")
+        strong = create_model(cls.strong_model_name())
+        pm = prompt_manager_cls(max_char_limit=int(os.getenv("CASCADE_STRONG_MAX_CHARS", "12000")))
+        return cls(strong, pm, screener=HeuristicScreener() if screener.strip().lower() == "heuristic" else None)
+
+    @staticmethod
+    def strong_model_name() -> str:
+        return os.getenv("CASCADE_STRONG_MODEL", "gemini-2.5-flash")
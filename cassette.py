@@ -0,0 +1,176 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict
+
+
+class CassetteMiss(KeyError):
+    """Raised in replay mode when a request was never recorded"""
+
+
+class Cassette:
+    """Gzip-compressed JSONL store of HTTP and model responses keyed by request.
+
+    In record mode each new interaction is appended as its own gzip member, so a
+    crashed recording keeps everything captured so far. In replay mode the file
+    is loaded once and lookups return the recorded bytes without any waiting.
+    """
+
+    def __init__(self, path: str, mode: str):
+        if mode not in {'record', 'replay'}:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._load()
+        elif mode == 'replay':
+            raise FileNotFoundError(f"Cassette not found: {path}")
+
+    @classmethod
+    def from_env(cls) -> 'Cassette | None':
+        """CASSETTE_MODE=record|replay with CASSETTE_PATH (default cassettes/session.jsonl.gz)"""
+        mode = os.getenv("CASSETTE_MODE", "").strip().lower()
+        if mode not in {'record', 'replay'}:
+            return None
+        return cls(os.getenv("CASSETTE_PATH", os.path.join("cassettes", "session.jsonl.gz")), mode)
+
+    def _load(self):
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                self.entries.setdefault(entry['key'], entry)
+
+    @staticmethod
+    def key(kind: str, request: Dict[str, Any]) -> str:
+        blob = json.dumps({'kind': kind, 'request': request}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def lookup(self, key: str) -> Dict[str, Any] | None:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
+
+    def store(self, key: str, entry: Dict[str, Any]):
+        with self._lock:
+            if key in self.entries:
+                return
+            entry = dict(entry, key=key)
+            self.entries[key] = entry
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+class CassetteResponse:
+    """Minimal requests.Response look-alike rebuilt from a recorded entry"""
+
+    def __init__(self, entry: Dict[str, Any]):
+        self.status_code = entry['status_code']
+        self.headers = entry.get('headers', {})
+        self.encoding = entry.get('encoding') or 'utf-8'
+        self.content = base64.b64decode(entry['content'])
+        self.url = entry.get('url')
+
+    @property
+    def text(self) -> str:
+        return str(self.content, self.encoding, errors='replace')
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _normalize_params(params) -> list:
+    if not params:
+        return []
+    items = params.items() if isinstance(params, dict) else params
+    out = []
+    for k, v in items:
+        values = v if isinstance(v, (list, tuple)) else [v]
+        out.append([str(k), [str(x) for x in values]])
+    return sorted(out, key=lambda kv: kv[0])
+
+
+class CassetteSession:
+    """Wraps a requests.Session: records real GETs or replays them from the cassette"""
+
+    def __init__(self, session, cassette: Cassette):
+        self.session = session
+        self.cassette = cassette
+
+    def get(self, url, params=None, **kwargs):
+        key = Cassette.key('http', {'method': 'GET', 'url': url, 'params': _normalize_params(params)})
+        entry = self.cassette.lookup(key)
+        if entry is not None:
+            return CassetteResponse(entry)
+        if self.cassette.mode == 'replay':
+            raise CassetteMiss(f"No recorded response for GET {url}")
+        response = self.session.get(url, params=params, **kwargs)
+        self.cassette.store(key, {
+            'url': url,
+            'status_code': response.status_code,
+            'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+            # Resolve the encoding the way requests does so replayed .text is identical
+            'encoding': response.encoding or response.apparent_encoding,
+            'content': base64.b64encode(response.content or b'').decode('ascii'),
+        })
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+class _Usage:
+    def __init__(self, usage: Dict[str, int]):
+        self.prompt_token_count = usage.get('prompt_token_count', 0)
+        self.candidates_token_count = usage.get('candidates_token_count', 0)
+        self.total_token_count = usage.get('total_token_count', 0)
+
+
+class _ReplayedGeneration:
+    def __init__(self, entry: Dict[str, Any]):
+        self.text = entry['text']
+        self.usage_metadata = _Usage(entry.get('usage') or {})
+
+
+class CassetteModel:
+    """Wraps a GenerativeModel: records generate_content responses or replays them"""
+
+    def __init__(self, model, cassette: Cassette, model_name: str | None = None):
+        self.model = model
+        self.cassette = cassette
+        self.model_name = model_name or getattr(model, 'model_name', '') or ''
+
+    def generate_content(self, prompt):
+        key = Cassette.key('model', {'model': self.model_name, 'prompt': prompt})
+        entry = self.cassette.lookup(key)
+        if entry is not None:
+            return _ReplayedGeneration(entry)
+        if self.cassette.mode == 'replay':
+            raise CassetteMiss(f"No recorded model response for prompt ({len(prompt)} chars)")
+        response = self.model.generate_content(prompt)
+        usage = getattr(response, 'usage_metadata', None)
+        self.cassette.store(key, {
+            'text': response.text,
+            'usage': {
+                'prompt_token_count': getattr(usage, 'prompt_token_count', 0) or 0,
+                'candidates_token_count': getattr(usage, 'candidates_token_count', 0) or 0,
+                'total_token_count': getattr(usage, 'total_token_count', 0) or 0,
+            } if usage is not None else {},
+        })
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from preprocess import DERIVED_FIELDS, preprocess_records
+
+
+def run_key(query: str) -> str:
+    """Stable journal name for a research question"""
+    return hashlib.sha1((query or '').strip().lower().encode('utf-8')).hexdigest()[:16]
+
+
+class RunJournal:
+    """Append-only JSONL journal of completed pipeline stages.
+
+    Each line is one event: run params/strategies, a finished search strategy
+    (new document records plus the title_hash snapshot) or a finished analysis
+    batch. Loading folds the events back into state, ignoring a torn last line.
+    """
+
+    def __init__(self, query: str, directory: str | None = None):
+        directory = directory or os.getenv("CHECKPOINT_DIR", ".checkpoints")
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"{run_key(query)}.jsonl")
+        self.params: Dict[str, Any] = {}
+        self.strategies: List[Dict[str, Any]] | None = None
+        self.completed_strategies: set[int] = set()
+        self.document_store: Dict[str, Any] = {}
+        self.title_hash: Dict[str, Dict[str, int]] = {}
+        self.collapse_sizes: Dict[str, int] = {}
+        self.batch_results: Dict[str, Any] = {}
+
+    def start(self, resume: bool) -> bool:
+        """Load existing journal when resuming; otherwise truncate. Returns True if state was restored."""
+        if resume and os.path.exists(self.path):
+            self._load()
+            return bool(self.strategies or self.document_store or self.batch_results)
+        open(self.path, 'w').close()
+        return False
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash; everything before it is still valid
+                    break
+                kind = event.get('type')
+                if kind == 'params':
+                    self.params = event.get('params', {})
+                elif kind == 'strategies':
+                    self.strategies = event.get('strategies')
+                elif kind == 'search':
+                    self.completed_strategies.add(event['strategy_index'])
+                    self.document_store.update(event.get('documents', {}))
+                    self.title_hash = event.get('title_hash', self.title_hash)
+                    self.collapse_sizes = event.get('collapse_sizes', self.collapse_sizes)
+                elif kind == 'ocr':
+                    for doc_id, text in event.get('ocr', {}).items():
+                        if doc_id in self.document_store:
+                            self.document_store[doc_id]['ocr_text'] = text
+                elif kind == 'batch':
+                    self.batch_results.update(event.get('results', {}))
+
+    def _append(self, event: Dict[str, Any]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(event, default=_encode) + '\n')
+            f.flush()
+
+    def record_params(self, params: Dict[str, Any]):
+        self.params = params
+        self._append({'type': 'params', 'params': params})
+
+    def record_strategies(self, strategies: List[Dict[str, Any]]):
+        self.strategies = strategies
+        self._append({'type': 'strategies', 'strategies': strategies})
+
+    def record_search(self, strategy_index: int, content_store):
+        """Record a finished strategy: documents not yet journaled plus the current title counts
+        and collapsed group sizes (both feed frequency())"""
+        # Derived text fields (fingerprints etc.) are recomputed on restore, not journaled
+        new_docs = {doc_id: {k: v for k, v in rec.items() if k not in DERIVED_FIELDS}
+                    for doc_id, rec in content_store.document_store.items() if doc_id not in self.document_store}
+        self.document_store.update(new_docs)
+        self.completed_strategies.add(strategy_index)
+        self.title_hash = {t: dict(ids) for t, ids in content_store.title_hash.items()}
+        self.collapse_sizes = dict(content_store.collapse_sizes)
+        self._append({
+            'type': 'search',
+            'strategy_index': strategy_index,
+            'documents': new_docs,
+            'title_hash': self.title_hash,
+            'collapse_sizes': self.collapse_sizes,
+        })
+
+    def record_ocr(self, content_store, doc_ids=None):
+        """Record OCR text filled in after documents were journaled (only `doc_ids` when given)"""
+        store = content_store.document_store
+        candidates = store.keys() if doc_ids is None else [doc_id for doc_id in doc_ids if doc_id in store]
+        filled = {doc_id: store[doc_id].get('ocr_text') for doc_id in candidates
+                  if doc_id in self.document_store and self.document_store[doc_id].get('ocr_text') is None
+                  and store[doc_id].get('ocr_text') is not None}
+        if filled:
+            for doc_id, text in filled.items():
+                self.document_store[doc_id]['ocr_text'] = text
+            self._append({'type': 'ocr', 'ocr': filled})
+
+    def record_batch(self, results: Dict[str, Any]):
+        self.batch_results.update(results)
+        self._append({'type': 'batch', 'results': results})
+
+    def restore(self, content_store):
+        """Load journaled documents, title counts and collapsed group sizes into a fresh content store"""
+        for doc_id, rec in self.document_store.items():
+            rec = dict(rec)
+            if isinstance(rec.get('date'), list):
+                rec['date'] = set(rec['date'])
+            content_store.document_store[doc_id] = rec
+        preprocess_records([content_store.document_store[doc_id] for doc_id in self.document_store])
+        for title, ids in self.title_hash.items():
+            for doc_id, count in ids.items():
+                content_store.title_hash[title][doc_id] = count
+        for doc_id, size in self.collapse_sizes.items():
+            content_store.collapse_sizes[doc_id] = size
+
+
+def _encode(value):
+    # document_store keeps dates in a set
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, defaultdict):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
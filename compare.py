@@ -0,0 +1,200 @@
+"""
+A/B comparison of the legacy v1 analyzer (0–10 scores) and AnalyzerV2 (labels).
+
+Documents are fetched once through UCSFContentStore, and both analyzers label the
+same set concurrently. Each analyzer reports its LLM calls, tokens and latency.
+The two rankings are compared with top-k overlap and Kendall's tau.
+
+Run:
+    python compare.py --query "youth women marketing tobacco" --rows 10
+    python compare.py --rows 25 --top 10 --json ab.json
+    python compare.py --replay cassettes/ab.jsonl.gz
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from analyzer_v2 import AnalyzerV2
+from cassette import Cassette, CassetteModel, CassetteSession
+from content_store import UCSFContentStore, new_session
+from legacy_v1.analyzer_v1 import Analyzer
+from legacy_v1.prompt_manager_v1 import PromptManager
+from metrics import RunMetrics
+from pipeline import GEMINI, create_model, generate_strategies
+from prompt_manager_v2 import PromptManagerV2
+
+DEFAULT_QUERY = "youth women marketing tobacco"
+
+
+class MeteredModel:
+    """Records every generate_content call (tokens, latency) into one analyzer's metrics"""
+
+    def __init__(self, model, metrics: RunMetrics, stage: str = 'llm'):
+        self.model = model
+        self.metrics = metrics
+        self.stage = stage
+
+    def generate_content(self, prompt, *args, **kwargs):
+        start = time.perf_counter()
+        with self.metrics.stage(self.stage):
+            response = self.model.generate_content(prompt, *args, **kwargs)
+        self.metrics.record_latency(self.stage, time.perf_counter() - start)
+        self.metrics.record_llm(self.stage, prompt if isinstance(prompt, str) else '', response)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def _score(details: Dict[str, Any]) -> float:
+    try:
+        return float(details.get('score', 0))
+    except Exception:
+        return 0.0
+
+
+def rank_by_score(scores: Dict[str, Any]) -> List[str]:
+    """v1 order: highest 0–10 score first, ties in analysis order (as the v1 summarizer picks)"""
+    return [doc_id for doc_id, _ in sorted(scores.items(), key=lambda item: _score(item[1]), reverse=True)]
+
+
+def kendall_tau(a: List[str], b: List[str]) -> float | None:
+    """Kendall's tau-a between two rankings over the documents both contain (None below 2)"""
+    pos = {doc_id: i for i, doc_id in enumerate(b)}
+    common = [doc_id for doc_id in a if doc_id in pos]
+    if len(common) < 2:
+        return None
+    ranks = [pos[doc_id] for doc_id in common]
+    concordant = discordant = 0
+    for i in range(len(ranks)):
+        for j in range(i + 1, len(ranks)):
+            if ranks[i] < ranks[j]:
+                concordant += 1
+            else:
+                discordant += 1
+    return (concordant - discordant) / (concordant + discordant)
+
+
+def rank_agreement(a: List[str], b: List[str], k: int) -> Dict[str, Any]:
+    k = max(1, min(k, len(a), len(b))) if a and b else 0
+    overlap = len(set(a[:k]) & set(b[:k])) if k else 0
+    return {
+        'k': k,
+        'overlap_at_k': overlap / k if k else 0.0,
+        'common_docs': len(set(a) & set(b)),
+        'kendall_tau': kendall_tau(a, b),
+    }
+
+
+def _arm_report(metrics: RunMetrics, elapsed: float, labeled: int, ranked: List[str]) -> Dict[str, Any]:
+    llm = metrics.report()['stages'].get('llm', {})
+    return {
+        'elapsed_s': elapsed,
+        'documents_labeled': labeled,
+        'llm_calls': int(llm.get('llm_calls', 0)),
+        'prompt_tokens': int(llm.get('prompt_tokens', 0)),
+        'response_tokens': int(llm.get('response_tokens', 0)),
+        'total_tokens': int(llm.get('total_tokens', 0)),
+        'prompt_chars': int(llm.get('prompt_chars', 0)),
+        'llm_p50_s': llm.get('p50_s', 0.0),
+        'llm_p90_s': llm.get('p90_s', 0.0),
+        'ranked': ranked,
+    }
+
+
+def compare_analyzers(model, query: str, strategies, additional_fqs, rows: int, content_store=None,
+                      metrics=None, top_k: int = 10) -> Dict[str, Any]:
+    """Fetch once, label the same documents with v1 and v2 in parallel, and compare cost and rankings"""
+    metrics = metrics or RunMetrics()
+    content_store = content_store or UCSFContentStore(metrics=metrics)
+    docs = content_store.execute_searches(strategies, rows, additional_fqs)
+    print(f"\n[A/B] {len(docs)} documents fetched once; labeling with v1 and v2")
+
+    arm_metrics = {'v1': RunMetrics(), 'v2': RunMetrics()}
+    v1 = Analyzer(MeteredModel(model, arm_metrics['v1']), strategies, content_store, PromptManager())
+    v2 = AnalyzerV2(MeteredModel(model, arm_metrics['v2']), strategies, content_store, PromptManagerV2(),
+                    metrics=arm_metrics['v2'])
+
+    def run_v1():
+        start = time.perf_counter()
+        scores = v1.analyze_documents_in_batches(docs, query)
+        return _arm_report(arm_metrics['v1'], time.perf_counter() - start, len(scores), rank_by_score(scores))
+
+    def run_v2():
+        start = time.perf_counter()
+        analysis = v2.analyze_documents_in_batches(docs, query)
+        ranked = v2.rank_results(analysis, docs)
+        return _arm_report(arm_metrics['v2'], time.perf_counter() - start, len(analysis), ranked)
+
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix='ab') as pool:
+        v1_future, v2_future = pool.submit(run_v1), pool.submit(run_v2)
+        arms = {'v1': v1_future.result(), 'v2': v2_future.result()}
+    return {
+        'query': query,
+        'documents': len(docs),
+        'arms': arms,
+        'agreement': rank_agreement(arms['v1']['ranked'], arms['v2']['ranked'], top_k),
+    }
+
+
+def print_comparison(result: Dict[str, Any]):
+    arms = result['arms']
+    print(f"\n[A/B] {result['documents']} shared documents for: {result['query']}")
+    print(f"  {'':<18}{'v1':>12}{'v2':>12}")
+    for key, fmt in (('documents_labeled', '{:>12d}'), ('llm_calls', '{:>12d}'), ('prompt_tokens', '{:>12d}'),
+                     ('response_tokens', '{:>12d}'), ('total_tokens', '{:>12d}'), ('llm_p50_s', '{:>12.2f}'),
+                     ('llm_p90_s', '{:>12.2f}'), ('elapsed_s', '{:>12.2f}')):
+        print(f"  {key:<18}" + fmt.format(arms['v1'][key]) + fmt.format(arms['v2'][key]))
+    agreement = result['agreement']
+    tau = agreement['kendall_tau']
+    print(f"  top-{agreement['k']} overlap: {agreement['overlap_at_k']:.0%}; "
+          f"Kendall tau over {agreement['common_docs']} common documents: "
+          + (f"{tau:.2f}" if tau is not None else "n/a"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the v1 and v2 analyzers on one shared document set")
+    parser.add_argument('--query', default=DEFAULT_QUERY)
+    parser.add_argument('--rows', type=int, default=10, help='Rows per search strategy')
+    parser.add_argument('--fq', action='append', default=[], help='Extra Solr filter query (repeatable)')
+    parser.add_argument('--top', type=int, default=10, help='k for top-k rank overlap')
+    parser.add_argument('--json', metavar='PATH', help='Write the comparison as JSON')
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument('--record', metavar='CASSETTE', help='Record Solr, OCR and model responses to a cassette')
+    cassette_group.add_argument('--replay', metavar='CASSETTE', help='Replay a recorded cassette offline')
+    args = parser.parse_args()
+
+    if args.record:
+        cassette = Cassette(args.record, 'record')
+    elif args.replay:
+        cassette = Cassette(args.replay, 'replay')
+    else:
+        cassette = Cassette.from_env()
+
+    metrics = RunMetrics()
+    model = create_model()
+    content_store = UCSFContentStore(metrics=metrics)
+    if cassette is not None:
+        model = CassetteModel(model, cassette, model_name=GEMINI)
+        content_store.session = CassetteSession(new_session() if cassette.mode == 'record' else None, cassette)
+
+    strategies = generate_strategies(model, args.query, metrics=metrics)
+    result = compare_analyzers(model, args.query, strategies, args.fq, args.rows,
+                               content_store=content_store, metrics=metrics, top_k=args.top)
+    print_comparison(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+        print(f"\n[A/B] Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
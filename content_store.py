@@ -1,12 +1,43 @@
 import os
-import requests
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from metrics import RunMetrics
+from hedging import HedgedFetcher
+from preprocess import normalize_title, preprocess_records
+from facets import FACET_FIELDS, FacetCache, merge_preflights, parse_facet_fields
 
 # Solr server enforces 100 docs per request; use paging via `start`.
 SERVER_PAGE_SIZE = 100
+# Request both legacy short names and new full names for stability
+METADATA_FIELDS = ','.join([
+    'id',
+    # title/author/type
+    'title','author','type','ti','au','dt',
+    # date fields
+    'documentdateiso','dd',
+    # bates/pages
+    'bates','pages','bn','pg',
+    # other fields used downstream
+    'availability','attach','access','artifact','collection','brand',
+    'score',
+])
+# Phase-1 fields for two-phase retrieval
+ID_FIELDS = 'id,score'
+# Keep `id:(...)` filters well under common 8 KB URL limits (other params share the URL)
+ID_FILTER_MAX_CHARS = 4000
+
+def new_session():
+    """Pooled HTTP session for Solr/OCR; requests is imported here to keep startup light"""
+    import requests
+    import urllib3
+    # OCR host is fetched with verify=False
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    return requests.Session()
+
 
 class UCSFContentStore:
-    def __init__(self):
+    def __init__(self, session=None, ocr_cache=None, metrics=None, scheduler=None, facet_cache=None, seen=None):
         # Allow overriding endpoints via environment for compatibility with IDL updates
         self.base_url = os.getenv(
             "SOLR_BASE_URL",
@@ -18,35 +49,66 @@ class UCSFContentStore:
             # Keep existing default OCR host unless overridden
             "https://download.industrydocuments.ucsf.edu/",
         )
+        # Reuse one pooled HTTP session; a long-lived service may pass a shared one.
+        # Created on first request so dry runs never import requests.
+        self._session = session
+        # Optional OCR text cache shared across runs (doc_id -> text)
+        self.ocr_cache = ocr_cache if ocr_cache is not None else {}
+        self.metrics = metrics or RunMetrics()
         self.document_frequencies = defaultdict(int)
         self.document_store = {}  # Single source of truth for all document data
         self.title_hash = defaultdict(lambda: defaultdict(int))
         self.max_chars = 99300
         # Optional: enable cursorMark paging via env var
         self.use_cursor_mark = (os.getenv("USE_CURSOR_MARK", "false").strip().lower() in {"1", "true", "yes", "y"})
+        # Optional: fetch ids for all strategies first, then metadata once for the union
+        self.two_phase = (os.getenv("TWO_PHASE_SEARCH", "false").strip().lower() in {"1", "true", "yes", "y"})
+        # Optional: collapse same-title documents server-side ({!collapse}) so duplicates don't use up rows
+        self.collapse_titles = (os.getenv("SOLR_COLLAPSE_TITLES", "false").strip().lower() in {"1", "true", "yes", "y"})
+        self.collapse_field = os.getenv("SOLR_COLLAPSE_FIELD", "title").strip()
+        # Set once Solr rejects the collapse, so later strategies don't send the failing request again
+        self._collapse_failed = False
+        # Group size per kept doc ID (head + collapsed duplicates), summed across strategies
+        self.collapse_sizes = defaultdict(int)
+        # Optional: rows=0 facet preflight per strategy (skip empty strategies, plan pages)
+        self.use_preflight = (os.getenv("SOLR_PREFLIGHT", "false").strip().lower() in {"1", "true", "yes", "y"})
+        self.facet_cache = facet_cache
+        # Optional PriorityScheduler: orders OCR (and analysis batches) best-first and enforces a run deadline
+        self.scheduler = scheduler
+        # Concurrent OCR downloads (1 = sequential)
+        self.ocr_workers = max(1, int(os.getenv("OCR_WORKERS", "1")))
+        # With a RunJournal, fetched OCR is checkpointed every this many documents
+        self.ocr_journal_every = max(1, int(os.getenv("OCR_JOURNAL_EVERY", "20")))
+        # Optional HedgedFetcher: duplicate OCR requests slower than the observed p90 (OCR_HEDGE=true)
+        self.hedger = HedgedFetcher.from_env(metrics=self.metrics)
+        # Optional SeenRegistry: documents reviewed in earlier runs of the project are
+        # counted for frequency but get no OCR or analysis (novelty-only reruns)
+        self.seen = seen
         # Optional: skip OCR fetch (tests / faster runs)
         self.skip_ocr = (os.getenv("SKIP_OCR", "false").strip().lower() in {"1", "true", "yes", "y"})
 
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = new_session()
+        return self._session
+
+    @session.setter
+    def session(self, value):
+        self._session = value
+
     def _normalize_title(self, title: str) -> str:
         """Create a normalized version of the title for comparison"""
-        # Remove punctuation, convert to lowercase, and remove extra whitespace
-        normalized = ''.join(c.lower() for c in (title or '') if c.isalnum() or c.isspace())
-        tokens = normalized.split()
-        # Merge consecutive single-letter tokens (e.g., "r j" -> "rj") to collapse spacing differences like
-        # "R. J. Reynolds" vs "R.J. Reynolds" -> "rj reynolds"
-        merged: list[str] = []
-        buf = []
-        for tok in tokens:
-            if len(tok) == 1:
-                buf.append(tok)
-            else:
-                if buf:
-                    merged.append(''.join(buf))
-                    buf = []
-                merged.append(tok)
-        if buf:
-            merged.append(''.join(buf))
-        return ' '.join(merged)
+        return normalize_title(title)
+
+    def frequency(self, doc) -> int:
+        """Appearances of a cached document's normalized title across strategies, plus duplicates
+        Solr collapsed server-side (group size - 1 per appearance)"""
+        td = self.title_hash.get(doc.get('title') or '', {})
+        count = sum(td.values())
+        if doc.get('id') in self.collapse_sizes:
+            count += self.collapse_sizes[doc['id']] - td.get(doc['id'], 0)
+        return count
 
     def _count_document(self, doc_id, title):
         """Track document appearances, allowing content with same titles but different doc IDs"""
@@ -78,11 +140,13 @@ class UCSFContentStore:
             'type': doc_type,
             'bates': bates,
             'date': {date_val},
-            'ocr_text': None
+            'score': doc.get('score'),
+            'ocr_text': None,
+            'seen': self.seen is not None and doc_id in self.seen
         }
         return
 
-    def process_docs(self, docs, search_strategy):
+    def process_docs(self, docs, search_strategy, fetch_ocr: bool = True):
         """Caches documents and updates frequencies of seen documents for results of a search strategy"""
         for doc in docs:
             doc_id = doc['id']
@@ -91,107 +155,369 @@ class UCSFContentStore:
             title = self._normalize_title(raw_title)
             self._cache(doc, doc_id, title, search_strategy)
             self._count_document(doc_id, title)
-        self._update_missing_ocr()
+        if fetch_ocr:
+            self._update_missing_ocr()
     
-    def _update_missing_ocr(self):
+    def _update_missing_ocr(self, journal=None):
+        """Fetch OCR for cached documents that lack it; with a journal, OCR is checkpointed
+        every `ocr_journal_every` documents so an interrupted run keeps what it fetched"""
+        pending = [data for data in self.document_store.values() if data['ocr_text'] is None and not data.get('seen')]
+        if not pending:
+            return
         if self.skip_ocr:
-            [self.document_store[doc_id].__setitem__('ocr_text', '')
-             for doc_id, data in self.document_store.items()
-             if data['ocr_text'] is None]
-        else:
-            [self.document_store[doc_id].__setitem__('ocr_text', self.get_ocr_text(doc_id, self.max_chars)) 
-             for doc_id, data in self.document_store.items() 
-             if data['ocr_text'] is None]
+            for data in pending:
+                data['ocr_text'] = ''
+            preprocess_records(pending)
+            if journal is not None:
+                journal.record_ocr(self, [data['id'] for data in pending])
+            return
+        if self.scheduler is not None:
+            pending = self.scheduler.order(pending, self)
+
+        def fetch(data):
+            # Past the deadline, leave OCR unset (a resumed run can still fetch it)
+            if self.scheduler is not None and self.scheduler.expired():
+                return data
+            data['ocr_text'] = self.get_ocr_text(data['id'], self.max_chars)
+            return data
+
+        done = []
+        pool = ThreadPoolExecutor(max_workers=self.ocr_workers) if self.ocr_workers > 1 else None
+        try:
+            # Workers pick up submissions in order, so priority order is kept
+            for data in (pool.map(fetch, pending) if pool is not None else map(fetch, pending)):
+                done.append(data['id'])
+                if journal is not None and len(done) >= self.ocr_journal_every:
+                    journal.record_ocr(self, done)
+                    done = []
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+            if journal is not None:
+                # Also keeps OCR that workers finished ahead of an error or interrupt
+                journal.record_ocr(self, [data['id'] for data in pending])
+        # Normalized text, fingerprints and prompt snippets, computed once per document
+        with self.metrics.stage('preprocess', docs=len(pending)):
+            preprocess_records(pending)
+        skipped = sum(1 for data in pending if data['ocr_text'] is None)
+        if skipped:
+            print(f"Run deadline reached; skipped OCR for {skipped} lower-priority documents")
 
     def get_ocr_text(self, doc_id: str, max_chars) -> str:
         """Gets OCR text for a document"""
+        cached = self.ocr_cache.get(doc_id)
+        self.metrics.record_cache('ocr', cached is not None)
+        if cached is not None:
+            return cached[:max_chars]
         path_segment = '/'.join(list(doc_id[:4].lower()))
         url = f"{self.ocr_base}{path_segment}/{doc_id.lower()}/{doc_id.lower()}.ocr"
+        request = lambda: self.session.get(url, verify=False, timeout=10)
         try:
-            response = requests.get(url, verify=False, timeout=10)
+            start = time.perf_counter()
+            with self.metrics.stage('ocr', doc_id=doc_id):
+                response = self.hedger.call(request) if self.hedger is not None else request()
+            self.metrics.record_latency('ocr', time.perf_counter() - start)
+            self.metrics.incr('ocr', 'requests')
+            self.metrics.incr('ocr', 'bytes', len(response.content or b''))
             if response.status_code == 200:
-                return response.text[:max_chars]
+                text = response.text[:max_chars]
+                self.ocr_cache[doc_id] = text
+                return text
             return ""
         except Exception as e:
             print(f"Error getting OCR text for {doc_id}: {e}")
             return ""
 
-    def execute_searches(self, strategies, max_results: int = 2, additional_fqs=None, use_cursor: bool | None = None):
+    def _solr_get(self, params):
+        """One Solr request, timed and counted under the 'solr' stage"""
+        with self.metrics.stage('solr', q=params.get('q')):
+            response = self.session.get(self.base_url, params=params, verify=False)
+        self.metrics.incr('solr', 'requests')
+        self.metrics.incr('solr', 'bytes', len(response.content or b''))
+        return response
+
+    def _base_params(self, strategy, additional_fqs, use_cursor: bool, fl: str = METADATA_FIELDS,
+                     collapse: bool = False):
+        """Solr params for one strategy (rows fixed to server page size; we trim client-side)"""
+        base_params = {
+            'q': strategy['search_terms'],
+            'fq': ['availability:public'],
+            'wt': 'json',
+            'rows': str(SERVER_PAGE_SIZE),
+            # For cursorMark, add a unique tiebreaker. Many Solr setups allow 'score desc, id asc'.
+            'sort': 'score desc, id asc' if use_cursor else 'score desc',
+            'fl': fl,
+        }
+        if additional_fqs:
+            base_params['fq'].extend(additional_fqs)
+
+        # Add strategy filters
+        for field, value in strategy.get('filters', {}).items():
+            base_params['fq'].append(f'{field}:{value}')
+
+        if collapse:
+            # One document per title group; untitled docs are kept individually.
+            # expand.rows=0 returns only the size of each collapsed group.
+            base_params['fq'].append(f'{{!collapse field={self.collapse_field} nullPolicy=expand}}')
+            base_params['expand'] = 'true'
+            base_params['expand.rows'] = '0'
+            if self.collapse_field not in fl.split(','):
+                base_params['fl'] = f'{fl},{self.collapse_field}'
+        return base_params
+
+    def _record_groups(self, payload, docs):
+        """Store group sizes from the `expanded` section of a collapsed response"""
+        expanded = payload.get('expanded') or {}
+        for doc in docs:
+            value = doc.get(self.collapse_field)
+            if isinstance(value, list):
+                value = value[0] if value else None
+            hidden = (expanded.get(str(value)) or {}).get('numFound', 0) if value is not None else 0
+            self.collapse_sizes[doc['id']] += 1 + hidden
+
+    def _fetch_page(self, base_params, state, use_cursor: bool):
+        """Fetch one page at `state` (start offset or cursorMark). Returns (docs, next_state, payload);
+        next_state is None when there is nothing further to page, payload is None on a non-200."""
+        params = dict(base_params)
+        if use_cursor:
+            params['cursorMark'] = state
+        else:
+            params['start'] = str(state)
+        response = self._solr_get(params)
+        if response.status_code != 200:
+            print(f"Solr returned HTTP {response.status_code} for '{base_params.get('q')}'")
+            return [], None, None
+        payload = response.json()
+        docs = payload.get('response', {}).get('docs', [])
+        if use_cursor:
+            next_cursor = payload.get('nextCursorMark')
+            next_state = next_cursor if next_cursor and next_cursor != state else None
+        else:
+            num_found = payload.get('response', {}).get('numFound')
+            next_state = state + SERVER_PAGE_SIZE
+            if num_found is not None and next_state >= num_found:
+                next_state = None
+        return docs, next_state, payload
+
+    def iter_search(self, strategy, fqs=None, max_results: int | None = None, use_cursor: bool | None = None,
+                    fl: str = METADATA_FIELDS, collapse: bool = False, prefetch: bool = True):
+        """Yield raw Solr docs for one strategy, page by page, stopping after `max_results` (if given).
+        Pages come in SERVER_PAGE_SIZE chunks via `start` or `cursorMark`; while the caller consumes
+        one page the next is fetched in the background. Stop iterating to stop paging."""
+        if use_cursor is None:
+            use_cursor = self.use_cursor_mark
+        collapse = collapse and not self._collapse_failed
+        base_params = self._base_params(strategy, fqs, use_cursor, fl=fl, collapse=collapse)
+        pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        yielded = 0
+        state = '*' if use_cursor else 0
+        pending = None
+        try:
+            while state is not None and (max_results is None or yielded < max_results):
+                if pending is not None:
+                    docs, next_state, payload = pending.result()
+                    pending = None
+                else:
+                    docs, next_state, payload = self._fetch_page(base_params, state, use_cursor)
+                if payload is None and collapse and yielded == 0:
+                    # e.g. a tokenized collapse field; rather than losing the strategy, page it uncollapsed
+                    print(f"Collapse on '{self.collapse_field}' failed; retrying without collapse "
+                          f"and not collapsing later searches")
+                    self.metrics.incr('solr', 'collapse_fallbacks')
+                    self._collapse_failed = True
+                    collapse = False
+                    base_params = self._base_params(strategy, fqs, use_cursor, fl=fl)
+                    continue
+                if not docs:
+                    break
+                remaining = None if max_results is None else max_results - yielded
+                page = docs if remaining is None else docs[:remaining]
+                if collapse:
+                    self._record_groups(payload, page)
+                # Prefetch only if this page won't satisfy the request
+                if pool is not None and next_state is not None and (remaining is None or len(docs) < remaining):
+                    pending = pool.submit(self._fetch_page, base_params, next_state, use_cursor)
+                for doc in page:
+                    yielded += 1
+                    yield doc
+                state = next_state
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def execute_searches(self, strategies, max_results: int = 2, additional_fqs=None, use_cursor: bool | None = None,
+                         journal=None, two_phase: bool | None = None, collapse_titles: bool | None = None,
+                         preflight: bool | None = None):
         """Execute search strategies and return new documents.
         The upstream Solr endpoint returns up to 100 records per request regardless of `rows`.
         We page in SERVER_PAGE_SIZE chunks using `start`, then trim to `max_results` per strategy.
+        When a RunJournal is given, strategies it already recorded are skipped and each
+        finished strategy is checkpointed.
+        With `two_phase` (default TWO_PHASE_SEARCH env), strategies first fetch only `id,score`;
+        metadata is then fetched once for the deduplicated ID set before any OCR.
+        With `collapse_titles` (default SOLR_COLLAPSE_TITLES env), Solr returns one document per
+        `collapse_field` value and the group sizes land in `collapse_sizes`; client-side title
+        normalization still runs as a safety net.
+        With `preflight` (default SOLR_PREFLIGHT env), a cached rows=0 request per strategy skips
+        strategies without matches and caps paging at numFound.
         """
         if use_cursor is None:
             use_cursor = self.use_cursor_mark
-        for strategy in strategies:
-            print(f"\nExecuting strategy: {strategy.get('search_terms')}")
+        if two_phase is None:
+            two_phase = self.two_phase
+        if collapse_titles is None:
+            collapse_titles = self.collapse_titles
+        if preflight is None:
+            preflight = self.use_preflight
+        if self.scheduler is not None:
+            self.scheduler.start()
+        with self.metrics.stage('execute_searches'):
+            if two_phase:
+                self._execute_two_phase(strategies, max_results, additional_fqs, use_cursor, journal,
+                                        collapse_titles, preflight)
+            else:
+                self._execute_per_strategy(strategies, max_results, additional_fqs, use_cursor, journal,
+                                           collapse_titles, preflight)
+            if journal is not None:
+                # Finish OCR interrupted by a crash in an earlier run
+                self._update_missing_ocr(journal)
+        return self.document_store
 
-            # Base params (rows fixed to server page size; we'll trim client-side)
-            base_params = {
-                'q': strategy['search_terms'],
-                'fq': ['availability:public'],
-                'wt': 'json',
-                'rows': str(SERVER_PAGE_SIZE),
-                # For cursorMark, add a unique tiebreaker. Many Solr setups allow 'score desc, id asc'.
-                'sort': 'score desc, id asc' if use_cursor else 'score desc',
-                # Request both legacy short names and new full names for stability
-                'fl': ','.join([
-                    'id',
-                    # title/author/type
-                    'title','author','type','ti','au','dt',
-                    # date fields
-                    'documentdateiso','dd',
-                    # bates/pages
-                    'bates','pages','bn','pg',
-                    # other fields used downstream
-                    'availability','attach','access','artifact','collection','brand',
-                    'score',
-                ])
-            }
-            if additional_fqs:
-                base_params['fq'].extend(additional_fqs)
+    def _pending(self, strategies, journal, additional_fqs, max_results, preflight):
+        """Yield (idx, strategy, rows to fetch); with preflight, empty strategies are skipped
+        and the row count is capped at numFound so paging is planned up front."""
+        for idx, strategy in enumerate(strategies):
+            if journal is not None and idx in journal.completed_strategies:
+                print(f"\nSkipping completed strategy: {strategy.get('search_terms')}")
+                continue
+            limit = max_results
+            if preflight:
+                found = self.preflight(strategy, additional_fqs).get('numFound')
+                if found == 0:
+                    print(f"\nSkipping strategy with no matches: {strategy.get('search_terms')}")
+                    continue
+                if found is not None:
+                    limit = min(max_results, found)
+                    pages = -(-limit // SERVER_PAGE_SIZE)
+                    print(f"\nPreflight: {found} matches for '{strategy.get('search_terms')}'; "
+                          f"fetching {limit} in {pages} page(s)")
+            yield idx, strategy, limit
 
-            # Add strategy filters
-            for field, value in strategy.get('filters', {}).items():
-                base_params['fq'].append(f'{field}:{value}')
+    def preflight(self, strategy, fqs=None) -> dict:
+        """One rows=0 facet request: numFound plus dt/collection/brand counts, cached locally"""
+        params = self._base_params(strategy, fqs, use_cursor=False, fl='id')
+        params.update({'rows': '0', 'facet': 'true', 'facet.field': list(FACET_FIELDS),
+                       'facet.mincount': '1', 'facet.limit': '-1'})
+        if self.facet_cache is None:
+            self.facet_cache = FacetCache()
+        key = FacetCache.key(self.base_url, params['q'], params['fq'])
+        cached = self.facet_cache.get(key)
+        self.metrics.record_cache('preflight', cached is not None)
+        if cached is not None:
+            return cached
+        try:
+            response = self._solr_get(params)
+            if response.status_code != 200:
+                return {}
+            payload = response.json()
+        except Exception as e:
+            print(f"Error running preflight: {e}")
+            return {}
+        result = {
+            'numFound': payload.get('response', {}).get('numFound', 0),
+            'facets': parse_facet_fields(payload),
+        }
+        self.facet_cache.put(key, result)
+        return result
+
+    def preflight_all(self, strategies, fqs=None) -> dict:
+        """Preflight every strategy and merge counts (for filter menus)"""
+        return merge_preflights([self.preflight(strategy, fqs) for strategy in strategies])
 
-            # Page until we collect at least max_results, then trim
-            collected = []
+    def _execute_per_strategy(self, strategies, max_results, additional_fqs, use_cursor, journal, collapse, preflight):
+        for idx, strategy, limit in self._pending(strategies, journal, additional_fqs, max_results, preflight):
+            print(f"\nExecuting strategy: {strategy.get('search_terms')}")
             try:
-                if use_cursor:
-                    cursor = '*'
-                    while len(collected) < max_results:
-                        params = dict(base_params)
-                        params['cursorMark'] = cursor
-                        response = requests.get(self.base_url, params=params, verify=False)
-                        if response.status_code != 200:
-                            break
-                        payload = response.json()
-                        docs = payload.get('response', {}).get('docs', [])
-                        if not docs:
-                            break
-                        collected.extend(docs)
-                        next_cursor = payload.get('nextCursorMark')
-                        if not next_cursor or next_cursor == cursor:
-                            break
-                        cursor = next_cursor
-                else:
-                    start = 0
-                    while len(collected) < max_results:
-                        params = dict(base_params)
-                        params['start'] = str(start)
-                        response = requests.get(self.base_url, params=params, verify=False)
-                        if response.status_code != 200:
-                            break
-                        docs = response.json().get('response', {}).get('docs', [])
-                        if not docs:
-                            break
-                        collected.extend(docs)
-                        # Advance page
-                        start += SERVER_PAGE_SIZE
+                collected = list(self.iter_search(strategy, additional_fqs, limit, use_cursor, collapse=collapse))
                 # Process only up to max_results
-                self.process_docs(collected[:max_results], search_strategy=strategy)
+                self.metrics.incr('solr', 'documents', len(collected))
+                self.process_docs(collected, search_strategy=strategy, fetch_ocr=False)
+                if journal is not None:
+                    journal.record_search(idx, self)
+                # With a scheduler, OCR waits until every strategy has been counted
+                if self.scheduler is None:
+                    self._update_missing_ocr(journal)
             except Exception as e:
                 print(f"Error executing search: {e}")
+        if self.scheduler is not None:
+            self._update_missing_ocr(journal)
 
-        return self.document_store
+    def _execute_two_phase(self, strategies, max_results, additional_fqs, use_cursor, journal, collapse, preflight):
+        # Phase 1: cheap id/score pages per strategy
+        hits: list[tuple[int, dict, list]] = []
+        for idx, strategy, limit in self._pending(strategies, journal, additional_fqs, max_results, preflight):
+            print(f"\nExecuting strategy (ids): {strategy.get('search_terms')}")
+            try:
+                ids = list(self.iter_search(strategy, additional_fqs, limit, use_cursor, fl=ID_FIELDS,
+                                            collapse=collapse))
+            except Exception as e:
+                print(f"Error executing search: {e}")
+                continue
+            hits.append((idx, strategy, ids))
+
+        # Phase 2: one bulk metadata fetch for the union of IDs
+        union = list(dict.fromkeys(hit['id'] for _, _, ids in hits for hit in ids))
+        overlap = sum(len(ids) for _, _, ids in hits) - len(union)
+        print(f"\nFetching metadata for {len(union)} unique documents ({overlap} cross-strategy repeats skipped)")
+        metadata = self.fetch_metadata(union)
+
+        for idx, strategy, ids in hits:
+            docs = []
+            for hit in ids:
+                doc = metadata.get(hit['id'])
+                if doc is None:
+                    continue
+                # Keep the strategy's own relevance score
+                docs.append(dict(doc, score=hit.get('score', doc.get('score'))))
+            self.metrics.incr('solr', 'documents', len(docs))
+            # Cache and count every strategy first; OCR runs once afterwards
+            self.process_docs(docs, search_strategy=strategy, fetch_ocr=False)
+            if journal is not None:
+                journal.record_search(idx, self)
+        self._update_missing_ocr(journal)
+
+    def fetch_metadata(self, doc_ids) -> dict:
+        """Bulk metadata lookup via `id:(...)` filter queries chunked to page size and URL limits"""
+        metadata = {}
+        for chunk in _chunk_ids(doc_ids):
+            params = {
+                'q': '*:*',
+                'fq': ['availability:public', f"id:({' OR '.join(chunk)})"],
+                'wt': 'json',
+                'rows': str(SERVER_PAGE_SIZE),
+                'fl': METADATA_FIELDS,
+            }
+            try:
+                response = self._solr_get(params)
+                if response.status_code != 200:
+                    continue
+                for doc in response.json().get('response', {}).get('docs', []):
+                    metadata[doc['id']] = doc
+            except Exception as e:
+                print(f"Error fetching metadata: {e}")
+        return metadata
+
+
+def _chunk_ids(doc_ids, max_ids: int = SERVER_PAGE_SIZE, max_chars: int = ID_FILTER_MAX_CHARS):
+    """Split IDs so each `id:(...)` filter fits one Solr page and stays under the URL budget"""
+    chunk: list[str] = []
+    size = 0
+    for doc_id in doc_ids:
+        extra = len(doc_id) + 4  # " OR "
+        if chunk and (len(chunk) >= max_ids or size + extra > max_chars):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(doc_id)
+        size += extra
+    if chunk:
+        yield chunk
@@ -0,0 +1,129 @@
+import datetime
+import os
+import threading
+
+from metrics import RunMetrics
+
+
+class LocalContextCache:
+    """Stand-in for a provider context cache, for tests and offline runs.
+
+    Remembers the current prefix and counts how often a batch reuses it, then
+    sends prefix + task to the plain model, so responses match an uncached run.
+    """
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics or RunMetrics()
+        self.prefix = None
+        self.creates = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def _touch(self, prefix: str) -> bool:
+        with self._lock:
+            hit = self.prefix == prefix
+            if hit:
+                self.hits += 1
+            else:
+                self.prefix = prefix
+                self.creates += 1
+        self.metrics.record_cache('context_cache', hit)
+        return hit
+
+    def generate_content(self, model, prefix: str, task: str):
+        self._touch(prefix)
+        return model.generate_content(prefix + task)
+
+    def close(self):
+        pass
+
+
+class GeminiContextCache(LocalContextCache):
+    """Explicit Gemini context cache: the prefix is uploaded once per run as CachedContent and
+    each batch only sends the query and documents. Falls back to full prompts if the provider
+    rejects the cache, or without trying when the prefix is estimated (4 chars/token) to be
+    below CONTEXT_CACHE_MIN_TOKENS (default 1024, Gemini 2.5 Flash's minimum).
+
+    Gemini 2.5 models also cache repeated prefixes of that size implicitly, which the
+    stable prompt layout benefits from even without this handle.
+    """
+
+    def __init__(self, model_name: str, ttl_s: float | None = None, metrics=None):
+        super().__init__(metrics)
+        self.model_name = model_name
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.getenv("CONTEXT_CACHE_TTL_S", "3600"))
+        self.min_tokens = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "1024"))
+        self._caches = []  # every CachedContent created this run; deleted on close()
+        self._cached_model = None
+        self._failed = False
+
+    def _bind(self, prefix: str):
+        if len(prefix) // 4 < self.min_tokens:
+            raise ValueError(f"prefix is about {len(prefix) // 4} tokens, below the {self.min_tokens}-token minimum")
+        from dotenv import load_dotenv
+        import google.generativeai as genai
+        from google.generativeai import caching
+        load_dotenv()
+        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+        cached = caching.CachedContent.create(
+            model=f"models/{self.model_name}",
+            contents=[prefix],
+            ttl=datetime.timedelta(seconds=self.ttl_s),
+        )
+        # An older cache may still serve in-flight batches, so it is only deleted on close()
+        self._caches.append(cached)
+        self._cached_model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+
+    def _model_for(self, prefix: str):
+        """Cached-content model for `prefix`, created on first use; None once caching is disabled.
+        Check and bind happen under one lock so concurrent batches create the cache only once."""
+        with self._lock:
+            if self._failed:
+                return None
+            hit = self.prefix == prefix and self._cached_model is not None
+            if hit:
+                self.hits += 1
+            else:
+                try:
+                    self._bind(prefix)
+                except Exception as e:
+                    self._failed = True
+                    print(f"[context-cache] Disabled, sending full prompts: {e}")
+                    return None
+                self.prefix = prefix
+                self.creates += 1
+            cached_model = self._cached_model
+        self.metrics.record_cache('context_cache', hit)
+        return cached_model
+
+    def generate_content(self, model, prefix: str, task: str):
+        cached_model = self._model_for(prefix)
+        if cached_model is None:
+            return model.generate_content(prefix + task)
+        # The cached model bypasses `model`, so reuse its AdaptiveLimiter (LimitedModel) when it has one
+        limiter = getattr(model, 'limiter', None)
+        if limiter is not None:
+            return limiter.call(cached_model.generate_content, task)
+        return cached_model.generate_content(task)
+
+    def close(self):
+        """Delete the provider-side caches so they stop accruing storage cost"""
+        with self._lock:
+            caches, self._caches = self._caches, []
+            self._cached_model = None
+            self.prefix = None
+        for cached in caches:
+            try:
+                cached.delete()
+            except Exception:
+                pass
+
+
+def context_cache_from_env(model_name: str, metrics=None):
+    """CONTEXT_CACHE=gemini|local selects a cache handle; unset means no explicit cache"""
+    mode = os.getenv("CONTEXT_CACHE", "").strip().lower()
+    if mode == "gemini":
+        return GeminiContextCache(model_name, metrics=metrics)
+    if mode == "local":
+        return LocalContextCache(metrics=metrics)
+    return None
@@ -0,0 +1,113 @@
+import csv
+import json
+import os
+from typing import Any, Dict, List
+
+# One column set for every event, so CSV rows line up; unused fields stay empty
+FIELDS = ['event', 'doc_id', 'title', 'type', 'date', 'bates', 'search_strategy', 'frequency',
+          'label', 'confidence', 'evidence', 'reasons', 'rank', 'cluster', 'summary']
+
+
+def _date(value) -> str:
+    if isinstance(value, (set, list, tuple)):
+        return ', '.join(sorted(str(v) for v in value))
+    return '' if value is None else str(value)
+
+
+def _strategy(value) -> str:
+    if isinstance(value, dict):
+        return value.get('search_terms') or ''
+    return '' if value is None else str(value)
+
+
+def _quotes(details: Dict[str, Any]) -> List[str]:
+    quotes = []
+    for ev in details.get('evidence') or []:
+        quote = ev.get('quote') if isinstance(ev, dict) else ev
+        if quote:
+            quotes.append(str(quote))
+    return quotes
+
+
+class ResultWriter:
+    """Streams per-document results to JSONL or CSV (chosen by extension) while a run is in progress.
+
+    Rows are buffered and written in chunks of `chunk_rows` (EXPORT_CHUNK_ROWS, default 50),
+    each followed by a flush, so memory stays bounded and the file can be tailed. Every row
+    is one event: `verdict` when a batch is labeled, `rank` with the final position and
+    dedup cluster, and `summary` when a summary is ready.
+    """
+
+    def __init__(self, path: str, content_store=None, chunk_rows: int | None = None, append: bool = False):
+        self.path = path
+        self.format = 'csv' if path.lower().endswith('.csv') else 'jsonl'
+        self.content_store = content_store
+        self.chunk_rows = chunk_rows or int(os.getenv("EXPORT_CHUNK_ROWS", "50"))
+        self.rows_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # False when appending to an export that already has rows (a resumed run)
+        self.new_file = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, 'a' if append else 'w', encoding='utf-8', newline='')
+        self._csv = None
+        if self.format == 'csv':
+            self._csv = csv.DictWriter(self._f, fieldnames=FIELDS, extrasaction='ignore')
+            if self.new_file:
+                self._csv.writeheader()
+                self._f.flush()
+
+    def _metadata(self, doc_id: str) -> Dict[str, Any]:
+        store = self.content_store
+        doc = store.document_store.get(doc_id) if store is not None else None
+        if doc is None:
+            return {'doc_id': doc_id}
+        return {
+            'doc_id': doc_id,
+            'title': doc.get('title'),
+            'type': doc.get('type'),
+            'date': _date(doc.get('date')),
+            'bates': doc.get('bates'),
+            'search_strategy': _strategy(doc.get('search_strategy')),
+            'frequency': store.frequency(doc),
+        }
+
+    def _emit(self, row: Dict[str, Any]):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_rows:
+            self.flush()
+
+    def write_verdicts(self, analysis: Dict[str, Any]):
+        """One `verdict` row per document of a labeled batch"""
+        for doc_id, details in analysis.items():
+            row = {'event': 'verdict', **self._metadata(doc_id)}
+            row.update(label=details.get('label'), confidence=details.get('confidence'),
+                       evidence=_quotes(details), reasons=details.get('reasons'))
+            self._emit(row)
+
+    def write_ranking(self, ranked: List[str], clusters: Dict[str, str]):
+        """One `rank` row per labeled document; collapsed duplicates get no rank, only their cluster"""
+        positions = {doc_id: i for i, doc_id in enumerate(ranked, start=1)}
+        for doc_id, head in clusters.items():
+            self._emit({'event': 'rank', 'doc_id': doc_id, 'rank': positions.get(doc_id), 'cluster': head})
+
+    def write_summary(self, doc_id: str, summary: str):
+        self._emit({'event': 'summary', 'doc_id': doc_id, 'summary': summary})
+        self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        if self._csv is not None:
+            for row in self._buffer:
+                self._csv.writerow({k: (' | '.join(v) if isinstance(v, list) else v) for k, v in row.items()})
+        else:
+            self._f.write(''.join(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in self._buffer))
+        self._f.flush()
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._f.close()
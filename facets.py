@@ -0,0 +1,76 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+# Solr fields shown as filter menus in filter_ui
+FACET_FIELDS = ['dt', 'collection', 'brand']
+
+
+class FacetCache:
+    """Small JSON file cache for preflight results, keyed by endpoint + query + filters"""
+
+    def __init__(self, path: str | None = None, ttl_s: float | None = None):
+        self.path = path or os.getenv("FACET_CACHE", os.path.join(".cache", "facets.json"))
+        self.ttl_s = ttl_s if ttl_s is not None else float(os.getenv("FACET_CACHE_TTL_S", str(24 * 3600)))
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Any] | None = None
+
+    @staticmethod
+    def key(base_url: str, q: str, fqs: List[str]) -> str:
+        blob = json.dumps([base_url, q, sorted(fqs)], ensure_ascii=False)
+        return hashlib.sha1(blob.encode('utf-8')).hexdigest()
+
+    def _load(self) -> Dict[str, Any]:
+        if self._entries is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None or time.time() - entry.get('at', 0) > self.ttl_s:
+                return None
+            return entry['value']
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            entries = self._load()
+            entries[key] = {'at': time.time(), 'value': value}
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+
+
+def parse_facet_fields(payload: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """Solr returns facet_fields as flat [value, count, value, count, ...] lists"""
+    fields = (payload.get('facet_counts') or {}).get('facet_fields') or {}
+    out: Dict[str, Dict[str, int]] = {}
+    for field, flat in fields.items():
+        if isinstance(flat, dict):
+            out[field] = {str(k): int(v) for k, v in flat.items()}
+        else:
+            out[field] = {str(flat[i]): int(flat[i + 1]) for i in range(0, len(flat) - 1, 2)}
+    return out
+
+
+def merge_preflights(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum numFound and facet counts across strategies (an upper bound, since strategies overlap)"""
+    merged: Dict[str, Any] = {'numFound': 0, 'facets': {f: {} for f in FACET_FIELDS}}
+    for r in results:
+        merged['numFound'] += r.get('numFound', 0)
+        for field, counts in (r.get('facets') or {}).items():
+            bucket = merged['facets'].setdefault(field, {})
+            for value, n in counts.items():
+                bucket[value] = bucket.get(value, 0) + n
+    return merged
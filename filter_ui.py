@@ -49,10 +49,11 @@ def _input(msg: str) -> str:
         return ""
 
 
-def _multi_select(options: list[str], title: str) -> list[str] | None:
+def _multi_select(options: list[str], title: str, counts: dict | None = None) -> list[str] | None:
     print(title)
     for idx, label in enumerate(options, start=1):
-        print(f"{idx}. {label}")
+        suffix = f" ({counts[label]})" if counts and label in counts else ""
+        print(f"{idx}. {label}{suffix}")
     while True:
         raw = _input("> ")
         if raw == "":
@@ -76,12 +77,26 @@ def _multi_select(options: list[str], title: str) -> list[str] | None:
             print("Invalid selection; use numbers in range or Enter.")
 
 
-def build_filters_interactively(default_date: str | None = None) -> dict:
+def _facet_options(static: list[str], counts: dict | None) -> list[str]:
+    """Live facet values sorted by count when a preflight ran, else the static list"""
+    if not counts:
+        return static
+    return sorted(counts, key=lambda v: (-counts[v], v))
+
+
+def build_filters_interactively(default_date: str | None = None, preflight=None) -> dict:
+    """`preflight`, if given, maps the current selection to {'numFound', 'facets'} (see facets.py);
+    menus then list the values that actually occur, with counts."""
     # Start with no default date selection unless provided explicitly
     selected: dict = {"date": [default_date]} if default_date else {}
     while True:
+        facets: dict = {}
         print("\nPress Enter to run search, or choose a filter to add:")
         print(f"Currently selected: {selected}")
+        if preflight is not None:
+            counts = preflight(selected) or {}
+            facets = counts.get("facets") or {}
+            print(f"Currently matching: ~{counts.get('numFound', 0)} documents")
         print("1. date")
         print("2. document type")
         print("3. collection")
@@ -117,15 +132,18 @@ def build_filters_interactively(default_date: str | None = None) -> dict:
             if new_dates:
                 selected["date"] = new_dates
         elif choice == 2:
-            vals = _multi_select(DOC_TYPES, "Select one or more document types (Enter to stop):")
+            options = _facet_options(DOC_TYPES, facets.get("dt"))
+            vals = _multi_select(options, "Select one or more document types (Enter to stop):", facets.get("dt"))
             if vals:
                 selected["type"] = vals
         elif choice == 3:
-            vals = _multi_select(COLLECTIONS, "Select one or more collections (Enter to stop):")
+            options = _facet_options(COLLECTIONS, facets.get("collection"))
+            vals = _multi_select(options, "Select one or more collections (Enter to stop):", facets.get("collection"))
             if vals:
                 selected["collection"] = vals
         elif choice == 4:
-            vals = _multi_select(BRANDS, "Select one or more brands (Enter to stop):")
+            options = _facet_options(BRANDS, facets.get("brand"))
+            vals = _multi_select(options, "Select one or more brands (Enter to stop):", facets.get("brand"))
             if vals:
                 selected["brand"] = vals
 
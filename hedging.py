@@ -0,0 +1,83 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metrics import RunMetrics, percentile
+
+
+class HedgedFetcher:
+    """Hedged requests for tail latency.
+
+    A request that hasn't answered by the observed `quantile` latency (p90 by default)
+    gets a duplicate, and whichever finishes first wins. Hedging starts after
+    `min_samples` requests, and duplicates are capped at `budget` × primary requests
+    (default 10% extra load). The slower copy is left to finish in the background.
+    """
+
+    def __init__(self, quantile: float | None = None, budget: float | None = None, min_samples: int | None = None,
+                 window: int = 200, max_workers: int = 16, metrics=None, stage: str = 'ocr'):
+        self.quantile = quantile if quantile is not None else float(os.getenv("OCR_HEDGE_QUANTILE", "0.9"))
+        self.budget = budget if budget is not None else float(os.getenv("OCR_HEDGE_BUDGET", "0.1"))
+        self.min_samples = min_samples if min_samples is not None else int(os.getenv("OCR_HEDGE_MIN_SAMPLES", "20"))
+        self.metrics = metrics or RunMetrics()
+        self.stage = stage
+        self.samples: deque = deque(maxlen=window)
+        self.primaries = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='hedge')
+
+    @classmethod
+    def from_env(cls, metrics=None) -> 'HedgedFetcher | None':
+        """Enabled by OCR_HEDGE=true"""
+        if os.getenv("OCR_HEDGE", "false").strip().lower() not in {"1", "true", "yes", "y"}:
+            return None
+        return cls(metrics=metrics)
+
+    def hedge_delay(self) -> float | None:
+        """Seconds to wait before hedging, or None while there are too few samples"""
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            return percentile(list(self.samples), self.quantile)
+
+    def _timed(self, fn):
+        start = time.perf_counter()
+        result = fn()
+        with self._lock:
+            self.samples.append(time.perf_counter() - start)
+        return result
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.primaries:
+                return False
+            self.hedges += 1
+            return True
+
+    def call(self, fn):
+        """Run `fn()` (an idempotent request), hedging it once if it is slow"""
+        with self._lock:
+            self.primaries += 1
+        delay = self.hedge_delay()
+        primary = self._pool.submit(self._timed, fn)
+        if delay is None:
+            return primary.result()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget():
+            return primary.result()
+        self.metrics.incr(self.stage, 'hedged_requests')
+        hedge = self._pool.submit(self._timed, fn)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self.metrics.incr(self.stage, 'hedge_wins')
+                    return future.result()
+                error = future.exception()
+        raise error
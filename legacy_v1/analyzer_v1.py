@@ -1,10 +1,6 @@
-import requests
 import json
 from typing import List, Dict, Any, Set, Tuple
 from collections import defaultdict
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-from urllib.parse import urlencode
 import re
 
 class Analyzer:
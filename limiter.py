@@ -0,0 +1,106 @@
+import os
+import random
+import threading
+import time
+
+from metrics import RunMetrics
+
+_THROTTLE_MARKERS = ('429', 'resource exhausted', 'resource_exhausted', 'quota', 'rate limit', 'too many requests')
+
+
+def is_throttle(exc: Exception) -> bool:
+    """Gemini surfaces throttling as ResourceExhausted / HTTP 429; match on type name, code or message"""
+    if getattr(exc, 'code', None) == 429 or getattr(exc, 'status_code', None) == 429:
+        return True
+    if type(exc).__name__ in {'ResourceExhausted', 'TooManyRequests'}:
+        return True
+    text = str(exc).lower()
+    return any(marker in text for marker in _THROTTLE_MARKERS)
+
+
+class AdaptiveLimiter:
+    """AIMD limit on in-flight model calls, shared by every caller of one model.
+
+    Each healthy call (no error, latency under `latency_target_s`) adds 1/limit,
+    so the limit grows by about one per window of `limit` calls. A throttled call
+    halves it; a slow call trims it by 10%. Throttled calls are retried with
+    jittered exponential backoff instead of failing the batch.
+    """
+
+    def __init__(self, initial: int | None = None, min_limit: int = 1, max_limit: int | None = None,
+                 latency_target_s: float | None = None, max_retries: int | None = None,
+                 backoff_s: float = 1.0, metrics=None):
+        self.max_limit = max_limit if max_limit is not None else int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+        self.min_limit = min_limit
+        self.limit = float(initial if initial is not None else int(os.getenv("LLM_CONCURRENCY", "2")))
+        self.limit = min(max(self.limit, self.min_limit), self.max_limit)
+        self.latency_target_s = latency_target_s if latency_target_s is not None \
+            else float(os.getenv("LLM_LATENCY_TARGET_S", "30"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_MAX_RETRIES", "5"))
+        self.backoff_s = backoff_s
+        self.metrics = metrics or RunMetrics()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_env(cls, metrics=None) -> 'AdaptiveLimiter | None':
+        """Enabled by ADAPTIVE_CONCURRENCY=true"""
+        if os.getenv("ADAPTIVE_CONCURRENCY", "false").strip().lower() not in {"1", "true", "yes", "y"}:
+            return None
+        return cls(metrics=metrics)
+
+    def _acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _release(self, latency_s: float, outcome: str):
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == 'throttled':
+                self.limit = max(self.min_limit, self.limit / 2)
+            elif outcome == 'ok' and latency_s > self.latency_target_s:
+                self.limit = max(self.min_limit, self.limit * 0.9)
+            elif outcome == 'ok':
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def call(self, fn, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self._acquire()
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = fn(*args, **kwargs)
+                outcome = 'ok'
+                return result
+            except Exception as e:
+                if is_throttle(e):
+                    outcome = 'throttled'
+                    self.metrics.incr('llm_limiter', 'throttled')
+                if outcome != 'throttled' or attempt == self.max_retries:
+                    raise
+            finally:
+                self._release(time.perf_counter() - start, outcome)
+            self.metrics.incr('llm_limiter', 'retries')
+            time.sleep(self.backoff_s * (2 ** attempt) * (0.5 + random.random()))
+
+    def summary(self) -> str:
+        return f"concurrency limit {self.limit:.1f} (peak in-flight {self.peak_in_flight})"
+
+
+class LimitedModel:
+    """Wraps a GenerativeModel so generate_content goes through an AdaptiveLimiter"""
+
+    def __init__(self, model, limiter: AdaptiveLimiter):
+        self.model = model
+        self.limiter = limiter
+
+    def generate_content(self, *args, **kwargs):
+        return self.limiter.call(self.model.generate_content, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
@@ -1,41 +1,110 @@
+import argparse
 import os
 import sys
-from dotenv import load_dotenv
-import google.generativeai as genai
 
 # Ensure project root is on sys.path (harmless if already present)
 ROOT = os.path.abspath(os.path.dirname(__file__))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from search_strategies import SearchStrategies
-from content_store import UCSFContentStore
 from filter_ui import build_filters_interactively, build_solr_fqs
+from pipeline import GEMINI, create_model, generate_strategies, analyze_and_rank, summarize_ranked
+from checkpoint import RunJournal
+from metrics import RunMetrics
+from content_store import UCSFContentStore, new_session
+from cassette import Cassette, CassetteModel, CassetteSession
+from scheduler import PriorityScheduler
+from seen import SeenRegistry
+from export import ResultWriter
+from cascade import ModelCascade
 from prompt_manager_v2 import PromptManagerV2
-from analyzer_v2 import AnalyzerV2
-from summarize import Summarizer
-from summary_prompt_manager_v2 import SummaryPromptManagerV2
+from limiter import AdaptiveLimiter, LimitedModel
+from context_cache import GeminiContextCache, LocalContextCache, context_cache_from_env
 
 
 def main():
-    load_dotenv()
-    api_key = os.getenv('GEMINI_API_KEY')
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel('gemini-2.5-flash-lite')
+    parser = argparse.ArgumentParser(description="Tobacco documents research pipeline (v2)")
+    parser.add_argument('--resume', action='store_true',
+                        help='Resume the last run for this question from its checkpoint journal')
+    parser.add_argument('--metrics-report', metavar='PATH', help='Write a JSON per-stage run report')
+    parser.add_argument('--trace', metavar='PATH', help='Write a Chrome trace-event file (chrome://tracing, Perfetto)')
+    parser.add_argument('--priority', action='store_true',
+                        help='OCR and analyze documents best-first (cross-strategy frequency and Solr score)')
+    parser.add_argument('--deadline', type=float, metavar='SECONDS',
+                        help='Stop starting new OCR/analysis work after this many seconds (implies --priority)')
+    parser.add_argument('--preflight', action='store_true',
+                        help='Size each strategy with a cached rows=0 facet query; filter menus show live counts')
+    parser.add_argument('--cascade', nargs='?', const='model', choices=['model', 'heuristic'],
+                        help='Screen documents cheaply (Gemini lite or a local heuristic) and escalate '
+                             'strong/smoking_gun or low-confidence verdicts to a stronger model')
+    parser.add_argument('--context-cache', choices=['gemini', 'local'],
+                        help='Reuse one cached prompt prefix for every analysis batch (local = offline stub)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Run model calls concurrently under an AIMD limit that backs off and retries on 429s')
+    parser.add_argument('--project', metavar='NAME',
+                        help='Skip documents already reviewed in this project and remember the new ones (or SEEN_PROJECT)')
+    parser.add_argument('--export', metavar='PATH',
+                        help='Stream verdicts, evidence, dedup clusters and summaries to a .jsonl or .csv file')
+    cassette_group = parser.add_mutually_exclusive_group()
+    cassette_group.add_argument('--record', metavar='CASSETTE', help='Record Solr, OCR and model responses to a cassette')
+    cassette_group.add_argument('--replay', metavar='CASSETTE', help='Replay a recorded cassette offline')
+    args = parser.parse_args()
+    metrics = RunMetrics()
+
+    if args.record:
+        cassette = Cassette(args.record, 'record')
+    elif args.replay:
+        cassette = Cassette(args.replay, 'replay')
+    else:
+        cassette = Cassette.from_env()
+
+    model = create_model()
+    scheduler = PriorityScheduler(deadline_s=args.deadline) if (args.priority or args.deadline) else PriorityScheduler.from_env()
+    seen = SeenRegistry(args.project) if args.project else SeenRegistry.from_env()
+    if seen is not None:
+        print(f"[seen] Project '{seen.project}': {len(seen)} documents already reviewed")
+    content_store = UCSFContentStore(metrics=metrics, scheduler=scheduler, seen=seen)
+    if args.preflight:
+        content_store.use_preflight = True
+    cascade = ModelCascade.from_env(create_model, PromptManagerV2, screener=args.cascade)
+    limiter = AdaptiveLimiter(metrics=metrics) if args.adaptive else AdaptiveLimiter.from_env(metrics=metrics)
+    if limiter is not None:
+        model = LimitedModel(model, limiter)
+        if cascade is not None:
+            # The stronger model has its own quota, so it gets its own limit
+            cascade.strong_model = LimitedModel(cascade.strong_model, AdaptiveLimiter(metrics=metrics))
+    if args.context_cache == 'gemini':
+        context_cache = GeminiContextCache(GEMINI, metrics=metrics)
+    elif args.context_cache == 'local':
+        context_cache = LocalContextCache(metrics=metrics)
+    else:
+        context_cache = context_cache_from_env(GEMINI, metrics=metrics)
+    if cassette is not None and isinstance(context_cache, GeminiContextCache):
+        # Cached-content calls bypass the cassette wrapper; keep prompts whole so they record/replay
+        context_cache = LocalContextCache(metrics=metrics)
+    if cassette is not None:
+        print(f"[cassette] {cassette.mode} mode: {cassette.path}")
+        model = CassetteModel(model, cassette, model_name=GEMINI)
+        if cascade is not None:
+            cascade.strong_model = CassetteModel(cascade.strong_model, cassette,
+                                                 model_name=ModelCascade.strong_model_name())
+        # Replay never touches the network, so don't build (or import) a real session
+        content_store.session = CassetteSession(new_session() if cassette.mode == 'record' else None, cassette)
 
     query = input("Enter your research question (press Enter for default): ").strip() or "youth women marketing tobacco"
 
-    strategies = SearchStrategies(model, query).generate_search_strategies(
-        f"Given this research question about tobacco documents: \"{query}\"\nGenerate 3 different search strategies to find industry documents that reveal intent of deception; however you cannot explicitly search for deception since Big Tobacco wouldn't call themselves deceptive. Each strategy should have 2-4 key terms that would help find relevant documents (not in quotes).\nReturn your response in this exact JSON format with no additional text:\n{{\n    \"strategies\": [\n        {{\n            \"search_terms\": \"term1 term2\",            \n            \"rationale\": \"why this might work\"\n        }}\n    ]\n}}"
-    )
+    # Checkpoint journal: every search strategy and analysis batch is recorded as it completes
+    journal = RunJournal(query)
+    resumed = journal.start(args.resume)
+    if resumed:
+        print(f"\nResuming from {journal.path}: {len(journal.completed_strategies)} strategies, "
+              f"{len(journal.document_store)} documents, {len(journal.batch_results)} verdicts already done")
 
-    # Interactive filters
-    filters = build_filters_interactively()
-    additional_fqs = build_solr_fqs(filters)
-
-    content_store = UCSFContentStore()
-    pm_v2 = PromptManagerV2()
-    analyzer = AnalyzerV2(model, strategies, content_store, pm_v2)
+    if resumed and journal.strategies:
+        strategies = journal.strategies
+    else:
+        strategies = generate_strategies(model, query, metrics=metrics)
+        journal.record_strategies(strategies)
 
     def _ask_int(prompt: str, default: int) -> int:
         raw = input(f"{prompt} (Enter for {default}): ").strip()
@@ -47,25 +116,69 @@ def main():
         except Exception:
             return default
 
-    rows = _ask_int("How many documents to retrieve per search strategy", 10)
+    if resumed and journal.params:
+        additional_fqs = journal.params.get('additional_fqs', [])
+        rows = journal.params.get('rows', 10)
+    else:
+        # Interactive filters
+        preflight = None
+        if content_store.use_preflight:
+            preflight = lambda sel: content_store.preflight_all(strategies, build_solr_fqs(sel))
+        filters = build_filters_interactively(preflight=preflight)
+        additional_fqs = build_solr_fqs(filters)
+        rows = _ask_int("How many documents to retrieve per search strategy", 10)
+        journal.record_params({'additional_fqs': additional_fqs, 'rows': rows})
     top_display = _ask_int("How many top document IDs display", 5)
     top_summarize = _ask_int("How many top documents to summarize", 3)
 
-    analysis, docs = analyzer.analyze_topic(query, rows, additional_fqs)
-    ranked = analyzer.rank_results(analysis, docs)
-
-    print(f"\n[V2] Top {top_display} by label/confidence/facets:")
-    for i, doc_id in enumerate(ranked[:top_display], start=1):
-        info = analysis.get(doc_id, {})
-        print(f"{i}. {doc_id}: {info.get('label')} (conf={info.get('confidence')})")
-
-    # Summarize top M using v2 summary prompt
-    summarizer = Summarizer(model, SummaryPromptManagerV2())
-    top_docs = {doc_id: docs[doc_id] for doc_id in ranked[:top_summarize] if doc_id in docs}
-    top_subset_scores = {doc_id: {"score": 3 if analysis[doc_id].get('label') == 'smoking_gun' else 2} for doc_id in top_docs}
-    summarizer.summarize_top_documents(query, docs, top_subset_scores, n=len(top_docs))
+    def show_provisional(ranker):
+        provisional = ranker.top(top_display)
+        labels = ', '.join(f"{doc_id} ({ranker.analysis[doc_id].get('label')})" for doc_id in provisional)
+        print(f"\n[V2] Provisional top {len(provisional)} after {len(ranker)} verdicts: {labels}")
+
+    # A resumed run appends to the export it started earlier; journaled verdicts are already
+    # in that file, so they are only written when the export is new
+    writer = ResultWriter(args.export, content_store=content_store, append=bool(resumed)) if args.export else None
+    try:
+        result = analyze_and_rank(model, query, strategies, additional_fqs, rows,
+                                  content_store=content_store, journal=journal, metrics=metrics, cascade=cascade,
+                                  context_cache=context_cache, on_progress=show_provisional,
+                                  on_batch=writer.write_verdicts if writer is not None else None,
+                                  on_resumed=writer.write_verdicts if writer is not None and writer.new_file else None)
+        analysis, docs, ranked = result['analysis'], result['docs'], result['ranked']
+        if writer is not None:
+            writer.write_ranking(ranked, result['ranker'].clusters())
+        if context_cache is not None:
+            context_cache.close()
+        if seen is not None:
+            print(f"[seen] Recorded {seen.add(analysis)} newly reviewed documents in {seen.path}")
+
+        print(f"\n[V2] Top {top_display} by label/confidence/facets:")
+        for i, doc_id in enumerate(ranked[:top_display], start=1):
+            info = analysis.get(doc_id, {})
+            print(f"{i}. {doc_id}: {info.get('label')} (conf={info.get('confidence')})")
+
+        # Summarize top M using v2 summary prompt
+        summarize_ranked(model, query, analysis, docs, ranked, top_summarize, metrics=metrics,
+                         on_summary=writer.write_summary if writer is not None else None)
+    finally:
+        # Flush and close the export even when analysis or summaries fail part-way
+        if writer is not None:
+            writer.close()
+            print(f"[export] {writer.rows_written} rows written to {writer.path}")
+
+    metrics.print_summary()
+    if limiter is not None:
+        print(f"[limiter] {limiter.summary()}")
+    if cassette is not None:
+        print(f"[cassette] {cassette.hits} replayed, {cassette.misses} not in cassette")
+    if args.metrics_report:
+        metrics.write_report(args.metrics_report)
+        print(f"[metrics] Run report written to {args.metrics_report}")
+    if args.trace:
+        metrics.write_trace(args.trace)
+        print(f"[metrics] Trace written to {args.trace}")
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,116 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict
+
+
+class RunMetrics:
+    """Per-stage wall time, counters and LLM usage for one pipeline run.
+
+    Stages are free-form names ("solr", "ocr", "analyze", "rank", "dedup",
+    "summarize"). Every timed span is also kept as a Chrome trace event so a
+    run can be opened in chrome://tracing or Perfetto.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self.started_at = time.time()
+        self.stages: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.trace_events: list[Dict[str, Any]] = []
+        self.latencies: Dict[str, list] = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name: str, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                s = self.stages[name]
+                s['calls'] += 1
+                s['wall_time_s'] += end - start
+                self.trace_events.append({
+                    'name': name,
+                    'ph': 'X',
+                    'ts': (start - self._t0) * 1e6,
+                    'dur': (end - start) * 1e6,
+                    'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                    'args': args,
+                })
+
+    def incr(self, stage: str, counter: str, n: float = 1):
+        with self._lock:
+            self.stages[stage][counter] += n
+
+    def record_cache(self, stage: str, hit: bool):
+        self.incr(stage, 'cache_hits' if hit else 'cache_misses')
+
+    def record_latency(self, stage: str, seconds: float):
+        """Keep a latency sample; the report adds p50/p90/p99 for the stage"""
+        with self._lock:
+            self.latencies[stage].append(seconds)
+
+    def record_llm(self, stage: str, prompt: str, response):
+        """Count prompt/response characters and Gemini token usage when the response reports it"""
+        self.incr(stage, 'llm_calls')
+        self.incr(stage, 'prompt_chars', len(prompt or ''))
+        text = getattr(response, 'text', None) or ''
+        self.incr(stage, 'response_chars', len(text))
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            self.incr(stage, 'prompt_tokens', getattr(usage, 'prompt_token_count', 0) or 0)
+            self.incr(stage, 'response_tokens', getattr(usage, 'candidates_token_count', 0) or 0)
+            self.incr(stage, 'total_tokens', getattr(usage, 'total_token_count', 0) or 0)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {name: dict(vals) for name, vals in self.stages.items()}
+            latencies = {name: list(samples) for name, samples in self.latencies.items()}
+        for name, samples in latencies.items():
+            vals = stages.setdefault(name, {})
+            for q in (50, 90, 99):
+                vals[f'p{q}_s'] = percentile(samples, q / 100)
+        for vals in stages.values():
+            hits, misses = vals.get('cache_hits', 0), vals.get('cache_misses', 0)
+            if hits + misses:
+                vals['cache_hit_rate'] = hits / (hits + misses)
+            if vals.get('screened'):
+                vals['escalation_rate'] = vals.get('escalated', 0) / vals['screened']
+        return {
+            'started_at': self.started_at,
+            'elapsed_s': time.perf_counter() - self._t0,
+            'stages': stages,
+        }
+
+    def write_report(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, sort_keys=True)
+
+    def write_trace(self, path: str):
+        with self._lock:
+            events = list(self.trace_events)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def print_summary(self):
+        print("\n[metrics] Per-stage summary:")
+        for name, vals in sorted(self.report()['stages'].items()):
+            extras = ', '.join(f"{k}={v:.3f}" if isinstance(v, float) and not v.is_integer() else f"{k}={int(v)}"
+                               for k, v in sorted(vals.items()) if k not in {'calls', 'wall_time_s'})
+            print(f"  {name}: {int(vals.get('calls', 0))} spans, {vals.get('wall_time_s', 0.0):.2f}s"
+                  + (f" ({extras})" if extras else ""))
+
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank percentile of `samples` (q in 0..1); 0.0 when empty"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
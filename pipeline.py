@@ -0,0 +1,89 @@
+import os
+import threading
+from typing import Any, Dict, List
+
+import prompts_v2
+from search_strategies import SearchStrategies
+from content_store import UCSFContentStore
+from scheduler import PriorityScheduler
+from prompt_manager_v2 import PromptManagerV2
+from analyzer_v2 import AnalyzerV2
+from summarize import Summarizer
+from summary_prompt_manager_v2 import SummaryPromptManagerV2
+
+GEMINI = 'gemini-2.5-flash-lite'
+
+
+class LazyModel:
+    """GenerativeModel stand-in that imports and configures the Gemini SDK on first use.
+
+    Importing google.generativeai dominates interpreter startup, so dry runs
+    (filter building, SKIP_OCR checks, cassette replay) never pay for it.
+    """
+
+    # Not limited itself; answering here keeps `getattr(model, 'limiter', None)` probes from loading the SDK
+    limiter = None
+
+    def __init__(self, model_name: str = GEMINI):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                from dotenv import load_dotenv
+                import google.generativeai as genai
+                load_dotenv()
+                genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+                self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate_content(self, *args, **kwargs):
+        return self._load().generate_content(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+
+def create_model(model_name: str = GEMINI):
+    """Return a model handle; the Gemini client is configured from .env on first call"""
+    return LazyModel(model_name)
+
+
+def generate_strategies(model, query: str, metrics=None) -> List[Dict[str, Any]]:
+    return SearchStrategies(model, query, metrics=metrics).generate_search_strategies(
+        prompts_v2.SEARCH_STRATEGIES_V2.format(uq=query)
+    )
+
+
+def analyze_and_rank(model, query: str, strategies, additional_fqs, rows: int,
+                     content_store=None, verdict_cache=None, journal=None, metrics=None,
+                     cascade=None, context_cache=None, on_progress=None, on_batch=None,
+                     on_resumed=None) -> Dict[str, Any]:
+    """Run search -> OCR -> v2 labels -> rank. Returns analysis, docs and ranked IDs.
+    With a ModelCascade, `model` is the screening model. A context cache (context_cache.py)
+    holds the shared batch-prompt prefix for every batch of the run. `on_progress(ranker)` is called
+    after each analysis batch with the IncrementalRanker (e.g. to show a provisional top-N), and
+    `on_batch(analysis)` with that batch's new verdicts (e.g. a streaming ResultWriter).
+    Verdicts reused from the journal skip `on_batch` and go to `on_resumed(analysis)`."""
+    content_store = content_store or UCSFContentStore(metrics=metrics, scheduler=PriorityScheduler.from_env())
+    if journal is not None:
+        journal.restore(content_store)
+    analyzer = AnalyzerV2(model, strategies, content_store, PromptManagerV2(context_cache=context_cache),
+                          verdict_cache=verdict_cache,
+                          journal=journal, metrics=metrics, cascade=cascade,
+                          on_progress=on_progress, on_batch=on_batch, on_resumed=on_resumed)
+    analysis, docs = analyzer.analyze_topic(query, rows, additional_fqs)
+    ranked = analyzer.rank_results(analysis, docs)
+    return {'analysis': analysis, 'docs': docs, 'ranked': ranked, 'ranker': analyzer.ranker}
+
+
+def summarize_ranked(model, query: str, analysis, docs, ranked, top_summarize: int, metrics=None,
+                     on_summary=None) -> Dict[str, str]:
+    """Summarize the top M ranked documents using the v2 summary prompt; `on_summary(doc_id, text)`
+    runs as each summary is ready"""
+    summarizer = Summarizer(model, SummaryPromptManagerV2(), metrics=metrics)
+    top_docs = {doc_id: docs[doc_id] for doc_id in ranked[:top_summarize] if doc_id in docs}
+    top_subset_scores = {doc_id: {"score": 3 if analysis[doc_id].get('label') == 'smoking_gun' else 2} for doc_id in top_docs}
+    return summarizer.summarize_top_documents(query, docs, top_subset_scores, n=len(top_docs), on_summary=on_summary)
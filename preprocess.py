@@ -0,0 +1,134 @@
+"""
+Text preprocessing computed once when OCR lands in the content store.
+
+Each document record gets:
+- `ocr_clean`:   lowercased alphanumeric text with collapsed whitespace (first FINGERPRINT_WINDOW chars)
+- `fingerprint`: frozenset of CRC32 hashes of 5-byte shingles of `ocr_clean`, for near-duplicate detection
+- `ocr_snippet`: the first SNIPPET_CHARS of OCR text, as sent to the batch and summary prompts
+
+These are derived fields: checkpoints leave them out and consumers recompute them
+with `ensure_preprocessed` when a record predates this stage.
+"""
+import os
+import re
+import zlib
+from typing import Any, Dict, List
+
+SHINGLE_SIZE = 5
+FINGERPRINT_WINDOW = 5000
+SNIPPET_CHARS = 3000
+DERIVED_FIELDS = ('ocr_clean', 'fingerprint', 'ocr_snippet')
+
+# Anything that is not a letter/digit/whitespace (str.isalnum / str.isspace); \w also matches "_"
+_NON_ALNUM = re.compile(r'[^\w\s]|_')
+
+
+def clean_text(s: str) -> str:
+    """Lowercase, replace punctuation with spaces and collapse whitespace"""
+    return ' '.join(_NON_ALNUM.sub(' ', s or '').lower().split())
+
+
+def normalize_title(title: str) -> str:
+    """Drop punctuation, lowercase, and merge runs of single letters ("R. J. Reynolds" -> "rj reynolds")"""
+    tokens = _NON_ALNUM.sub('', title or '').lower().split()
+    merged: List[str] = []
+    buf: List[str] = []
+    for tok in tokens:
+        if len(tok) == 1:
+            buf.append(tok)
+            continue
+        if buf:
+            merged.append(''.join(buf))
+            buf = []
+        merged.append(tok)
+    if buf:
+        merged.append(''.join(buf))
+    return ' '.join(merged)
+
+
+def fingerprint(cleaned: str, k: int = SHINGLE_SIZE) -> frozenset:
+    """Shingle hashes of already-cleaned text; for ASCII text this matches the set of k-char shingles"""
+    data = cleaned.encode('utf-8')
+    if len(data) < k:
+        return frozenset()
+    crc32 = zlib.crc32
+    return frozenset(crc32(data[i:i + k]) for i in range(len(data) - k + 1))
+
+
+def jaccard(a, b) -> float:
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    if inter == 0:
+        return 0.0
+    return inter / (len(a) + len(b) - inter)
+
+
+def near_duplicate(a, b, threshold: float) -> bool:
+    """jaccard(a, b) >= threshold, skipping the set intersection when sizes alone rule it out"""
+    if not a or not b:
+        return threshold <= 0.0
+    small, large = (len(a), len(b)) if len(a) <= len(b) else (len(b), len(a))
+    if small < threshold * large:
+        return False
+    return jaccard(a, b) >= threshold
+
+
+def snippet(doc: Dict[str, Any], max_chars: int) -> str:
+    """First `max_chars` of a record's OCR text, served from the stored snippet when it is long enough"""
+    cached = doc.get('ocr_snippet')
+    if cached is not None and (max_chars <= SNIPPET_CHARS or len(cached) < SNIPPET_CHARS):
+        return cached[:max_chars]
+    return (doc.get('ocr_text') or '')[:max_chars]
+
+
+def preprocess_text(text: str) -> Dict[str, Any]:
+    """Derived fields for one OCR text (pure function, safe to run in a worker process)"""
+    text = text or ''
+    # Cleaning only shrinks text, so a prefix usually suffices; fall back to the full text if it didn't
+    head = text[: FINGERPRINT_WINDOW * 2]
+    cleaned = clean_text(head)
+    if len(cleaned) < FINGERPRINT_WINDOW and len(head) < len(text):
+        cleaned = clean_text(text)
+    cleaned = cleaned[:FINGERPRINT_WINDOW]
+    return {
+        'ocr_clean': cleaned,
+        'fingerprint': fingerprint(cleaned),
+        'ocr_snippet': text[:SNIPPET_CHARS],
+    }
+
+
+def ensure_preprocessed(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill derived fields on a record that has OCR text but was not preprocessed at ingest"""
+    if doc.get('fingerprint') is None and doc.get('ocr_text') is not None:
+        doc.update(preprocess_text(doc['ocr_text']))
+    return doc
+
+
+def preprocess_records(records: List[Dict[str, Any]], workers: int | None = None, min_pool_docs: int | None = None):
+    """Preprocess records with OCR text in place; large pulls are spread across a process pool.
+
+    PREPROCESS_WORKERS (default CPU count) and PREPROCESS_POOL_MIN_DOCS (default 500)
+    control when the pool is used; below the threshold the pool startup costs more
+    than it saves. Workers start via forkserver (spawn where unavailable), never fork.
+    """
+    todo = [r for r in records if r.get('ocr_text') is not None]
+    if not todo:
+        return
+    if workers is None:
+        workers = int(os.getenv("PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
+    if min_pool_docs is None:
+        min_pool_docs = int(os.getenv("PREPROCESS_POOL_MIN_DOCS", "500"))
+    texts = [r['ocr_text'] for r in todo]
+    if workers > 1 and len(todo) >= min_pool_docs:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # Never fork: callers have threads running (service jobs, hedging, Solr prefetch) whose locks
+        # a forked child would inherit mid-use
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method)) as pool:
+            results = list(pool.map(preprocess_text, texts, chunksize=max(1, len(texts) // (workers * 4))))
+    else:
+        results = [preprocess_text(t) for t in texts]
+    for record, fields in zip(todo, results):
+        record.update(fields)
@@ -2,16 +2,22 @@ from typing import Dict, List, Any
 import re
 import json
 import prompts_v2
+from preprocess import snippet
 
 
 class PromptManagerV2:
     def __init__(self,
-                 batch_eval_template=prompts_v2.BATCH_DOC_EVAL_V2,
+                 prefix_template=prompts_v2.BATCH_DOC_EVAL_V2_PREFIX,
+                 task_template=prompts_v2.BATCH_DOC_EVAL_V2_TASK,
                  example_json=prompts_v2.EXAMPLE_JSON_EVAL_V2,
-                 max_char_limit=3000):
-        self.batch_eval_template = batch_eval_template
+                 max_char_limit=3000,
+                 context_cache=None):
+        self.prefix_template = prefix_template
+        self.task_template = task_template
         self.example_json = example_json
         self.max_char_limit = max_char_limit
+        # Optional context cache (see context_cache.py) holding the static prefix for the whole run
+        self.context_cache = context_cache
 
     def join_document_text(self, batch: List[Dict[str, Any]]) -> str:
         return "\n---\n".join([
@@ -21,19 +27,31 @@ class PromptManagerV2:
                 f"Type: {doc.get('type', '')}",
                 f"Date: {doc.get('date', '')}",
                 "Content:",
-                f"{(doc.get('ocr_text') or '')[: self.max_char_limit]}"
+                f"{snippet(doc, self.max_char_limit)}"
             ])
             for doc in batch
         ])
 
-    def create_document_analysis_prompt(self, documents: List[Dict[str, Any]], user_query: str) -> str:
-        doc_texts = self.join_document_text(documents)
-        return self.batch_eval_template.format(
+    def analysis_prefix(self) -> str:
+        """Instructions and schema; identical for every batch and every query"""
+        return self.prefix_template.format(ej=self.example_json) + "\n\n"
+
+    def analysis_task(self, documents: List[Dict[str, Any]], user_query: str) -> str:
+        return self.task_template.format(
             uq=user_query,
-            ej=self.example_json,
-            dt=doc_texts
+            dt=self.join_document_text(documents)
         )
 
+    def create_document_analysis_prompt(self, documents: List[Dict[str, Any]], user_query: str) -> str:
+        return self.analysis_prefix() + self.analysis_task(documents, user_query)
+
+    def generate_analysis(self, model, documents: List[Dict[str, Any]], user_query: str):
+        """Returns (full prompt, response); the prefix goes through the context cache when one is set"""
+        prefix, task = self.analysis_prefix(), self.analysis_task(documents, user_query)
+        if self.context_cache is not None:
+            return prefix + task, self.context_cache.generate_content(model, prefix, task)
+        return prefix + task, model.generate_content(prefix + task)
+
     def parse_response(self, response_text: str) -> Dict[str, Any]:
         json_match = re.search(r'\{.*\}', response_text.strip(), re.DOTALL)
         if json_match:
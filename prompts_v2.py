@@ -2,8 +2,15 @@
 Prompts v2: smoking-gun triage and evidence schema.
 """
 
-BATCH_DOC_EVAL_V2 = """
-You are evaluating tobacco industry documents for this research question: "{uq}".
+# Search strategy generation for v2 (search terms only)
+SEARCH_STRATEGIES_V2 = (
+    "Given this research question about tobacco documents: \"{uq}\"\nGenerate 3 different search strategies to find industry documents that reveal intent of deception; however you cannot explicitly search for deception since Big Tobacco wouldn't call themselves deceptive. Each strategy should have 2-4 key terms that would help find relevant documents (not in quotes).\nReturn your response in this exact JSON format with no additional text:\n{{\n    \"strategies\": [\n        {{\n            \"search_terms\": \"term1 term2\",            \n            \"rationale\": \"why this might work\"\n        }}\n    ]\n}}"
+)
+
+# Batch evaluation prompt, laid out for provider prefix/context caching:
+# the run-independent instructions and schema come first, the query and documents last.
+BATCH_DOC_EVAL_V2_PREFIX = """
+You are evaluating tobacco industry documents for the research question given below.
 
 Classify each document into one of four labels and extract concise evidence:
 
@@ -20,11 +27,17 @@ Rules:
 
 Return ONLY a JSON object with document IDs as keys, matching this schema:
 {ej}
+""".strip()
+
+BATCH_DOC_EVAL_V2_TASK = """
+Research question: "{uq}"
 
 Documents:
 {dt}
 """.strip()
 
+BATCH_DOC_EVAL_V2 = BATCH_DOC_EVAL_V2_PREFIX + "\n\n" + BATCH_DOC_EVAL_V2_TASK
+
 EXAMPLE_JSON_EVAL_V2 = (
     '{\n'
     '  "doc_id123": {\n'
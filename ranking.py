@@ -0,0 +1,222 @@
+import math
+from collections import Counter
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List
+
+from preprocess import ensure_preprocessed, near_duplicate
+
+TIER = {"smoking_gun": 3, "strong": 2, "related": 1, "irrelevant": 0}
+DEDUP_THRESHOLD = 0.92
+PREFERRED_DOC_TYPES = {"brand plan", "memo", "budget", "marketing document"}
+
+
+def _truthy(v) -> bool:
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, (int, float)):
+        return v != 0
+    if isinstance(v, str):
+        return v.strip().lower() in {"true", "yes", "y", "1"}
+    return bool(v)
+
+
+def facet_boost(d: Dict[str, Any]) -> float:
+    f = d.get("facets", {}) or {}
+    boost = 0.0
+    if _truthy(f.get("directive_language")):
+        boost += 0.05
+    if _truthy(f.get("budget_numbers")):
+        boost += 0.05
+    if _truthy(f.get("date_in_range")):
+        boost += 0.02
+    if _truthy(f.get("mentions_brands")):
+        boost += 0.02
+    dt_val = f.get("doc_type") or ""
+    if isinstance(dt_val, list):
+        dt = " ".join(str(x) for x in dt_val).lower()
+    else:
+        dt = str(dt_val).lower()
+    if any(p in dt for p in PREFERRED_DOC_TYPES):
+        boost += 0.03
+    return boost
+
+
+def _confidence(d: Dict[str, Any]) -> float:
+    try:
+        return float(d.get("confidence", 0.0))
+    except Exception:
+        return 0.0
+
+
+class FingerprintIndex:
+    """Exact near-duplicate lookup over kept fingerprints (Jaccard >= threshold).
+
+    Uses prefix filtering: with shingle hashes in a fixed global order, two sets
+    with Jaccard >= t must share one of the first |x| - ceil(t*|x|) + 1 hashes of
+    each set. Only documents sharing a prefix hash are compared in full. Ordering
+    by document frequency (rarest first) keeps the shared prefixes selective.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, doc_freq: Dict[int, int] | None = None):
+        self.threshold = threshold
+        self.doc_freq = doc_freq or {}
+        self._postings: Dict[int, List[tuple]] = {}
+
+    def _prefix(self, fp) -> List[int]:
+        size = max(len(fp) - math.ceil(self.threshold * len(fp)) + 1, 1)
+        df = self.doc_freq
+        # Shingle hashes are 32-bit, so (frequency, hash) packs into one int and sorts in C
+        return [key & 0xFFFFFFFF for key in sorted((df.get(t, 0) << 32) | t for t in fp)[:size]]
+
+    def insert(self, fp, key=None):
+        """Add `fp` under `key` unless a near-duplicate is already indexed.
+        Returns None if it was added, otherwise the key of the indexed duplicate."""
+        if not fp:
+            return None
+        prefix = self._prefix(fp)
+        seen = set()
+        for token in prefix:
+            for other, other_key in self._postings.get(token, ()):
+                if id(other) in seen:
+                    continue
+                seen.add(id(other))
+                if near_duplicate(fp, other, self.threshold):
+                    return other_key
+        for token in prefix:
+            self._postings.setdefault(token, []).append((fp, key))
+        return None
+
+    def remove(self, fp):
+        """Undo the latest insert of `fp`; inserts must be undone in reverse order"""
+        if not fp:
+            return
+        for token in self._prefix(fp):
+            postings = self._postings[token]
+            postings.pop()
+            if not postings:
+                del self._postings[token]
+
+
+class IncrementalRanker:
+    """Keeps verdicts in rank order as batches arrive, so a provisional top-N is
+    available at any time and the final list needs no full re-sort.
+
+    Order is label tier, then confidence band (2 decimals), then cross-strategy
+    frequency, then exact confidence and facet boost, then arrival order. This is
+    the same order as the original sort-then-group ranking. Dedup (same title,
+    or OCR fingerprint Jaccard >= 0.92 with a better-ranked kept document) is
+    applied while walking that order.
+
+    The dedup walk is kept between calls: `top(n)` only walks as far as it needs
+    to find `n` documents, and a new verdict rolls the walk back only as far as its
+    sort position. The FingerprintIndex orders shingles by a snapshot of document
+    frequencies, and that snapshot is refreshed each time the number of verdicts doubles.
+    """
+
+    def __init__(self, docs: Dict[str, Any], frequency: Callable[[Dict[str, Any]], int],
+                 threshold: float = DEDUP_THRESHOLD):
+        self.docs = docs
+        self.frequency = frequency
+        self.threshold = threshold
+        self.analysis: Dict[str, Any] = {}
+        self._entries: list = []  # ascending sort keys; best document first
+        self._keys: Dict[str, tuple] = {}
+        self._seq: Dict[str, int] = {}
+        # Shingle document frequencies, maintained as verdicts arrive, order FingerprintIndex prefixes
+        self._doc_freq: Counter = Counter()
+        # Dedup walk over _entries[:_walked]; _log holds one (doc_id, kept, title, fingerprint) per step for rollback
+        self._index: FingerprintIndex | None = None
+        self._snapshot_size = 0
+        self._walked = 0
+        self._kept: List[str] = []
+        self._titles: Dict[str, str] = {}
+        self._clusters: Dict[str, str] = {}
+        self._log: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self.analysis)
+
+    def _sort_key(self, doc_id: str, d: Dict[str, Any]) -> tuple:
+        doc = self.docs.get(doc_id)
+        tier = TIER.get(d.get("label", "irrelevant"), 0)
+        conf = _confidence(d)
+        freq = self.frequency(doc) if doc is not None else 0
+        # Negated so ascending order is best-first; arrival order breaks remaining ties
+        return (-tier, -round(conf, 2), -freq, -conf, -facet_boost(d), self._seq[doc_id], doc_id)
+
+    def update(self, analysis: Dict[str, Any]):
+        """Add (or replace) verdicts from one batch"""
+        for doc_id, details in analysis.items():
+            if doc_id in self._keys:
+                pos = bisect_left(self._entries, self._keys[doc_id])
+                self._rollback(pos)
+                del self._entries[pos]
+            else:
+                self._seq[doc_id] = len(self._seq)
+                doc = self.docs.get(doc_id)
+                if doc is not None:
+                    self._doc_freq.update(ensure_preprocessed(doc).get('fingerprint') or ())
+            self.analysis[doc_id] = details
+            key = self._sort_key(doc_id, details)
+            self._keys[doc_id] = key
+            pos = bisect_left(self._entries, key)
+            self._rollback(pos)
+            self._entries.insert(pos, key)
+
+    def covers(self, analysis: Dict[str, Any]) -> bool:
+        return len(analysis) == len(self.analysis) and all(self.analysis.get(k) is v for k, v in analysis.items())
+
+    def _rollback(self, pos: int):
+        """Undo walk steps at and after entry `pos`"""
+        while self._walked > pos:
+            doc_id, kept, title, fp = self._log.pop()
+            self._walked -= 1
+            del self._clusters[doc_id]
+            if kept:
+                self._kept.pop()
+                if title is not None:
+                    del self._titles[title]
+                self._index.remove(fp)
+
+    def _advance(self, n: int | None = None):
+        """Walk until `n` documents are kept (or every entry is walked)"""
+        if self._index is None or len(self.analysis) > 2 * self._snapshot_size:
+            # Rebuild with a fresh frequency snapshot; it stays fixed until the next rebuild,
+            # since prefix filtering needs one shingle order for every indexed set
+            self._index = FingerprintIndex(self.threshold, dict(self._doc_freq))
+            self._snapshot_size = len(self.analysis)
+            self._walked = 0
+            self._kept, self._titles, self._clusters, self._log = [], {}, {}, []
+        while self._walked < len(self._entries) and (n is None or len(self._kept) < n):
+            doc_id = self._entries[self._walked][-1]
+            doc = self.docs.get(doc_id) or {}
+            title = (doc.get('title') or '').strip()
+            titled = bool(title) and title != '(untitled)'
+            fp = ensure_preprocessed(doc).get('fingerprint')
+            if titled and title in self._titles:
+                head = self._titles[title]
+            else:
+                head = self._index.insert(fp, doc_id)
+            kept = head is None
+            if kept:
+                head = doc_id
+                self._kept.append(doc_id)
+                if titled:
+                    self._titles[title] = doc_id
+            self._clusters[doc_id] = head
+            self._log.append((doc_id, kept, title if kept and titled else None, fp))
+            self._walked += 1
+
+    def top(self, n: int | None = None) -> List[str]:
+        """Deduplicated ranking, stopping after `n` kept documents (all when None)"""
+        self._advance(n)
+        return self._kept[:n] if n is not None else list(self._kept)
+
+    def ranked(self) -> List[str]:
+        return self.top()
+
+    def clusters(self) -> Dict[str, str]:
+        """Dedup cluster of every verdict: the kept document it collapsed into (itself when kept).
+        Comes from the same walk as ranked(), so calling both costs one pass."""
+        self._advance()
+        return dict(self._clusters)
@@ -0,0 +1,54 @@
+import os
+import time
+from typing import Any, Dict, List
+
+
+class PriorityScheduler:
+    """Orders OCR fetches and analysis batches best-first and tracks an optional run deadline.
+
+    Priority = freq_weight * cross-strategy title frequency + score_weight * Solr score
+    normalized to the best score among the candidates. Ties keep insertion order.
+    When the deadline passes, callers stop starting new work, so whatever was
+    finished first is the most promising documents.
+    """
+
+    def __init__(self, freq_weight: float | None = None, score_weight: float | None = None,
+                 deadline_s: float | None = None):
+        self.freq_weight = freq_weight if freq_weight is not None else float(os.getenv("PRIORITY_FREQ_WEIGHT", "1.0"))
+        self.score_weight = score_weight if score_weight is not None else float(os.getenv("PRIORITY_SCORE_WEIGHT", "1.0"))
+        if deadline_s is None and os.getenv("RUN_DEADLINE_S"):
+            deadline_s = float(os.getenv("RUN_DEADLINE_S"))
+        self.deadline_s = deadline_s
+        self.deadline = None
+
+    def start(self):
+        """Start the deadline clock (once); called when searches begin, after any interactive prompts"""
+        if self.deadline_s and self.deadline is None:
+            self.deadline = time.monotonic() + self.deadline_s
+
+    @classmethod
+    def from_env(cls) -> 'PriorityScheduler | None':
+        """Enabled by PRIORITY_SCHEDULING=true or by setting RUN_DEADLINE_S"""
+        enabled = os.getenv("PRIORITY_SCHEDULING", "false").strip().lower() in {"1", "true", "yes", "y"}
+        return cls() if enabled or os.getenv("RUN_DEADLINE_S") else None
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def order(self, docs: List[Dict[str, Any]], content_store) -> List[Dict[str, Any]]:
+        """Return document records sorted by descending priority"""
+        scores = [_as_float(d.get('score')) for d in docs]
+        top = max(scores, default=0.0) or 1.0
+
+        def key(item):
+            doc, score = item
+            return self.freq_weight * content_store.frequency(doc) + self.score_weight * (score / top)
+
+        return [doc for doc, _ in sorted(zip(docs, scores), key=key, reverse=True)]
+
+
+def _as_float(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return 0.0
@@ -1,15 +1,19 @@
 import re
 from typing import List, Dict, Any, Set, Tuple
 import json
+from metrics import RunMetrics
 
 class SearchStrategies:
-    def __init__(self, model, query):
+    def __init__(self, model, query, metrics=None):
         self.model = model
         self.query = query
+        self.metrics = metrics or RunMetrics()
 
     def generate_search_strategies(self, prompt) -> List[Dict[str, Any]]:
             try:
-                response = self.model.generate_content(prompt)
+                with self.metrics.stage('strategies'):
+                    response = self.model.generate_content(prompt)
+                self.metrics.record_llm('strategies', prompt, response)
                 response_text = response.text.strip()
                 
                 # Try to find JSON in the response
@@ -0,0 +1,51 @@
+import heapq
+import os
+import re
+from bisect import bisect_left
+from typing import Iterable, List
+
+
+class SeenRegistry:
+    """Persistent set of reviewed document IDs for one project.
+
+    The exact store is an append-only text file with one ID per line
+    (`.seen/<project>.ids`, directory overridable with SEEN_DIR). In memory the IDs
+    are kept as one sorted list, so membership is a binary search.
+    """
+
+    def __init__(self, project: str, directory: str | None = None):
+        self.project = project
+        directory = directory or os.getenv("SEEN_DIR", ".seen")
+        safe = re.sub(r'[^\w.-]', '_', project.strip()) or 'default'
+        self.path = os.path.join(directory, f"{safe}.ids")
+        self._ids: List[str] = []
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._ids = sorted({line.strip() for line in f if line.strip()})
+
+    @classmethod
+    def from_env(cls) -> 'SeenRegistry | None':
+        """Enabled by SEEN_PROJECT=<name>"""
+        project = os.getenv("SEEN_PROJECT", "").strip()
+        return cls(project) if project else None
+
+    def __contains__(self, doc_id: str) -> bool:
+        i = bisect_left(self._ids, doc_id)
+        return i < len(self._ids) and self._ids[i] == doc_id
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, doc_ids: Iterable[str]) -> int:
+        """Record IDs as reviewed; returns how many were new"""
+        new = sorted({doc_id for doc_id in doc_ids if doc_id and doc_id not in self})
+        if not new:
+            return 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(f"{doc_id}\n" for doc_id in new))
+            f.flush()
+        self._ids = list(heapq.merge(self._ids, new))
+        return len(new)
@@ -0,0 +1,303 @@
+"""
+Long-lived research service: keeps the model client, HTTP connection pool and
+OCR/verdict caches warm across requests and runs several jobs concurrently.
+
+Run:
+    python service.py                      # HTTP on 127.0.0.1:8765
+    python service.py --socket /tmp/tr.sock  # Unix domain socket
+
+Endpoints (JSON):
+    GET  /health        -> service status and cache sizes
+    POST /research      -> run a job and wait for the result
+    POST /jobs          -> submit a job, returns {"job_id": ...}
+    GET  /jobs/<job_id> -> job status and result when done (kept for SERVICE_JOB_TTL_S after it finishes)
+    DELETE /jobs/<job_id> -> drop a finished job and its result early
+
+Job body:
+    {"query": "...", "filters": {"date": ["[1980 TO 1990]"]}, "rows": 10,
+     "top_display": 5, "top_summarize": 3, "strategies": [...optional...]}
+"""
+import argparse
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+ROOT = os.path.abspath(os.path.dirname(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from content_store import UCSFContentStore, new_session
+from metrics import RunMetrics
+from limiter import AdaptiveLimiter, LimitedModel
+from scheduler import PriorityScheduler
+from filter_ui import build_solr_fqs
+from pipeline import create_model, generate_strategies, analyze_and_rank, summarize_ranked
+
+
+class BoundedCache:
+    """Thread-safe LRU mapping with an optional TTL, capped by entry count and by total weight
+    (`weigh(value)`, e.g. characters of OCR text). Supports the `get` / `[key] = value` use of a dict."""
+
+    def __init__(self, max_entries: int, max_weight: int | None = None, ttl_s: float | None = None, weigh=None):
+        self.max_entries = max_entries
+        self.max_weight = max_weight
+        self.ttl_s = ttl_s
+        self.weigh = weigh or (lambda value: 1)
+        self.weight = 0
+        self._items: OrderedDict = OrderedDict()  # key -> (stored_at, weight, value); oldest first
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return default
+            if self.ttl_s is not None and time.monotonic() - item[0] > self.ttl_s:
+                self._drop(key)
+                return default
+            self._items.move_to_end(key)
+            return item[2]
+
+    def __setitem__(self, key, value):
+        w = self.weigh(value)
+        with self._lock:
+            if key in self._items:
+                self._drop(key)
+            self._items[key] = (time.monotonic(), w, value)
+            self.weight += w
+            while self._items and (len(self._items) > self.max_entries
+                                   or (self.max_weight is not None and self.weight > self.max_weight)):
+                self._drop(next(iter(self._items)))
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def _drop(self, key):
+        self.weight -= self._items.pop(key)[1]
+
+
+class ResearchService:
+    def __init__(self, model=None, max_jobs: int | None = None):
+        self.model = model or create_model()
+        # One AIMD limit for all jobs, since they share the same model quota
+        limiter = AdaptiveLimiter.from_env()
+        if limiter is not None:
+            self.model = LimitedModel(self.model, limiter)
+        # Shared across jobs: pooled connections plus OCR and verdict caches
+        self.session = new_session()
+        # Bounded so a long-running daemon doesn't grow without limit: OCR by total characters
+        # (SERVICE_OCR_CACHE_CHARS, default 200M), verdicts by count, both expiring after SERVICE_CACHE_TTL_S
+        ttl_s = float(os.getenv("SERVICE_CACHE_TTL_S", str(6 * 3600)))
+        self.ocr_cache = BoundedCache(max_entries=int(os.getenv("SERVICE_OCR_CACHE_DOCS", "20000")),
+                                      max_weight=int(os.getenv("SERVICE_OCR_CACHE_CHARS", "200000000")),
+                                      ttl_s=ttl_s, weigh=lambda text: len(text or ''))
+        self.verdict_cache = BoundedCache(max_entries=int(os.getenv("SERVICE_VERDICT_CACHE_SIZE", "100000")),
+                                          ttl_s=ttl_s)
+        if max_jobs is None:
+            max_jobs = int(os.getenv("SERVICE_MAX_JOBS", "4"))
+        self.executor = ThreadPoolExecutor(max_workers=max_jobs)
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        # Finished jobs are kept for SERVICE_JOB_TTL_S (so a lost response can be fetched again), or until deleted
+        self.job_ttl_s = float(os.getenv("SERVICE_JOB_TTL_S", "3600"))
+        self._lock = threading.Lock()
+
+    def run_job(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the v2 pipeline for one request body. Each job gets its own document store."""
+        query = (payload.get("query") or "").strip() or "youth women marketing tobacco"
+        rows = int(payload.get("rows", 10))
+        top_display = int(payload.get("top_display", 5))
+        top_summarize = int(payload.get("top_summarize", 3))
+        additional_fqs = build_solr_fqs(payload.get("filters") or {})
+        metrics = RunMetrics()
+        strategies = payload.get("strategies") or generate_strategies(self.model, query, metrics=metrics)
+
+        content_store = UCSFContentStore(session=self.session, ocr_cache=self.ocr_cache, metrics=metrics,
+                                         scheduler=PriorityScheduler.from_env())
+        result = analyze_and_rank(self.model, query, strategies, additional_fqs, rows,
+                                  content_store=content_store, verdict_cache=self.verdict_cache, metrics=metrics)
+        analysis, docs, ranked = result['analysis'], result['docs'], result['ranked']
+        summaries = (summarize_ranked(self.model, query, analysis, docs, ranked, top_summarize, metrics=metrics)
+                     if top_summarize else {})
+
+        top = []
+        for doc_id in ranked[:top_display]:
+            info = analysis.get(doc_id, {})
+            doc = docs.get(doc_id, {})
+            top.append({
+                'id': doc_id,
+                'title': doc.get('title'),
+                'label': info.get('label'),
+                'confidence': info.get('confidence'),
+                'evidence': info.get('evidence', []),
+            })
+        return {
+            'query': query,
+            'strategies': strategies,
+            'document_count': len(docs),
+            'top': top,
+            'summaries': summaries,
+            'metrics': metrics.report(),
+        }
+
+    def _prune_jobs(self):
+        """Drop finished jobs older than the TTL (caller holds the lock)"""
+        cutoff = time.monotonic() - self.job_ttl_s
+        for job_id in [j for j, state in self.jobs.items() if state.get('finished_at', cutoff + 1) < cutoff]:
+            del self.jobs[job_id]
+
+    def submit(self, payload: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._prune_jobs()
+            self.jobs[job_id] = {'status': 'queued'}
+        self.executor.submit(self._run_tracked, job_id, payload)
+        return job_id
+
+    def _run_tracked(self, job_id: str, payload: Dict[str, Any]):
+        with self._lock:
+            self.jobs[job_id] = {'status': 'running'}
+        try:
+            result = self.run_job(payload)
+            state = {'status': 'done', 'result': result}
+        except Exception as e:
+            print(f"[service] Job {job_id} failed: {e}")
+            state = {'status': 'error', 'error': str(e)}
+        state['finished_at'] = time.monotonic()
+        with self._lock:
+            self.jobs[job_id] = state
+
+    def job_status(self, job_id: str) -> Dict[str, Any] | None:
+        with self._lock:
+            self._prune_jobs()
+            state = self.jobs.get(job_id)
+            if state is None:
+                return None
+            return {k: v for k, v in state.items() if k != 'finished_at'}
+
+    def delete_job(self, job_id: str) -> bool | None:
+        """Drop a finished job; None if unknown, False if it is still queued or running"""
+        with self._lock:
+            self._prune_jobs()
+            state = self.jobs.get(job_id)
+            if state is None:
+                return None
+            if 'finished_at' not in state:
+                return False
+            del self.jobs[job_id]
+            return True
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            self._prune_jobs()
+            active = sum(1 for j in self.jobs.values() if j['status'] in {'queued', 'running'})
+        return {
+            'status': 'ok',
+            'active_jobs': active,
+            'ocr_cache_size': len(self.ocr_cache),
+            'ocr_cache_chars': self.ocr_cache.weight,
+            'verdict_cache_size': len(self.verdict_cache),
+        }
+
+
+def make_handler(service: ResearchService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body: Dict[str, Any]):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_json(self) -> Dict[str, Any] | None:
+            length = int(self.headers.get('Content-Length') or 0)
+            try:
+                return json.loads(self.rfile.read(length) or b'{}')
+            except Exception:
+                return None
+
+        def do_GET(self):
+            if self.path == '/health':
+                return self._send(200, service.health())
+            if self.path.startswith('/jobs/'):
+                state = service.job_status(self.path[len('/jobs/'):])
+                if state is None:
+                    return self._send(404, {'error': 'unknown job'})
+                return self._send(200, state)
+            self._send(404, {'error': 'not found'})
+
+        def do_DELETE(self):
+            if self.path.startswith('/jobs/'):
+                deleted = service.delete_job(self.path[len('/jobs/'):])
+                if deleted is None:
+                    return self._send(404, {'error': 'unknown job'})
+                if not deleted:
+                    return self._send(409, {'error': 'job has not finished'})
+                return self._send(200, {'deleted': True})
+            self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            payload = self._read_json()
+            if payload is None:
+                return self._send(400, {'error': 'invalid JSON body'})
+            if self.path == '/jobs':
+                return self._send(202, {'job_id': service.submit(payload)})
+            if self.path == '/research':
+                try:
+                    return self._send(200, service.executor.submit(service.run_job, payload).result())
+                except Exception as e:
+                    return self._send(500, {'error': str(e)})
+            self._send(404, {'error': 'not found'})
+
+        def address_string(self):
+            # Unix socket peers have no (host, port) tuple
+            return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    return Handler
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the research pipeline as a long-lived local service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', help='Serve on a Unix domain socket instead of TCP')
+    parser.add_argument('--max-jobs', type=int, default=None, help='Concurrent research jobs (default SERVICE_MAX_JOBS or 4)')
+    args = parser.parse_args()
+
+    service = ResearchService(max_jobs=args.max_jobs)
+    handler = make_handler(service)
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+        server = ThreadingUnixHTTPServer(args.socket, handler)
+        print(f"[service] Listening on unix:{args.socket}")
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), handler)
+        print(f"[service] Listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,22 @@
 from typing import List, Dict, Any, Set, Tuple
 from collections import defaultdict
-import urllib3
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from metrics import RunMetrics
 
 class Summarizer:
-    def __init__(self, model, prompt_manager) -> None:
+    def __init__(self, model, prompt_manager, metrics=None) -> None:
         self.model = model
         self.prompt_manager = prompt_manager
+        self.metrics = metrics or RunMetrics()
 
     def summarize(self, user_query, doc):
-        return self.model.generate_content(self.prompt_manager.create_summary_prompt([doc], user_query)).text
+        prompt = self.prompt_manager.create_summary_prompt([doc], user_query)
+        with self.metrics.stage('summarize', doc_id=doc.get('id')):
+            response = self.model.generate_content(prompt)
+        self.metrics.record_llm('summarize', prompt, response)
+        return response.text
 
-    def summarize_top_documents(self, user_query, cached_docs, analysis_results, n = 3):
+    def summarize_top_documents(self, user_query, cached_docs, analysis_results, n = 3, on_summary=None):
         # Sort documents by score in descending order
         top_docs = dict(
             sorted(
@@ -22,7 +26,23 @@ class Summarizer:
             )[:n]
         )
 
-        # Summarize directly!
+        # Summarize directly! With an AdaptiveLimiter on the model, summaries run concurrently
+        summaries = {}
+        limiter = getattr(self.model, 'limiter', None)
+        if limiter is not None and len(top_docs) > 1:
+            with ThreadPoolExecutor(max_workers=min(limiter.max_limit, len(top_docs))) as pool:
+                futures = {doc_id: pool.submit(self.summarize, user_query, cached_docs[doc_id]) for doc_id in top_docs}
+                for doc_id, future in futures.items():
+                    summary = future.result()
+                    print(f"{summary}")
+                    summaries[doc_id] = summary
+                    if on_summary is not None:
+                        on_summary(doc_id, summary)
+            return summaries
         for doc_id in top_docs.keys():
             summary = self.summarize(user_query, cached_docs[doc_id])
             print(f"{summary}")
+            summaries[doc_id] = summary
+            if on_summary is not None:
+                on_summary(doc_id, summary)
+        return summaries
@@ -1,5 +1,6 @@
 from typing import Dict, List, Any
 import prompts_v2
+from preprocess import snippet
 
 
 class SummaryPromptManagerV2:
@@ -15,7 +16,7 @@ class SummaryPromptManagerV2:
                 f"Type: {doc.get('type', '')}",
                 f"Date: {doc.get('date', '')}",
                 "Content:",
-                f"{(doc.get('ocr_text') or '')[: self.max_char_limit]}..."
+                f"{snippet(doc, self.max_char_limit)}..."
             ])
             for doc in documents
         ])